@@ -0,0 +1,76 @@
+# benchmarks/bench_csv_reader.py
+"""
+Compares the pandas and Arrow CSV reader engines of data_ingestion.csv_loader.
+
+Each dataset in data/ is inflated to --rows rows by repeating its sample rows,
+then parsed with both readers (parse only) and optionally loaded end-to-end
+into a throwaway SQLite database (--load).
+
+    python -m benchmarks.bench_csv_reader --rows 1000000 --datasets customer_segments sales_funnel_metrics
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+
+
+def inflate_csv(source_path: str, target_path: str, rows: int):
+    """Writes `rows` rows to `target_path` by cycling the rows of `source_path`."""
+    sample = pd.read_csv(source_path)
+    repeats = -(-rows // len(sample))
+    pd.concat([sample] * repeats, ignore_index=True).head(rows).to_csv(target_path, index=False)
+
+
+def time_parse(csv_path: str, reader: str, chunksize: int):
+    from data_ingestion.csv_loader import read_csv_chunks
+
+    start = time.perf_counter()
+    rows = sum(len(df) for df in read_csv_chunks(csv_path, chunksize=chunksize, reader=reader))
+    return rows, time.perf_counter() - start
+
+
+def time_load(csv_path: str, table_name: str, reader: str, chunksize: int):
+    from data_ingestion.csv_loader import load_csv_to_sql
+
+    start = time.perf_counter()
+    rows = load_csv_to_sql(csv_path, table_name, chunksize=chunksize, reader=reader)
+    return rows, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--chunksize", type=int, default=0, help="0 parses each file in one read")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--datasets", nargs="*", help="dataset names (default: all CSVs in --data-dir)")
+    parser.add_argument("--load", action="store_true", help="also time an end-to-end load into SQLite")
+    args = parser.parse_args()
+
+    datasets = args.datasets or sorted(os.path.splitext(f)[0] for f in os.listdir(args.data_dir) if f.endswith(".csv"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.load:
+            # Must be set before data_ingestion.db_connector is imported.
+            os.environ["DB_URI"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+
+        print(f"{'dataset':<30} {'reader':<7} {'rows':>10} {'parse s':>9} {'rows/s':>12}" + (f" {'load s':>9}" if args.load else ""))
+        for name in datasets:
+            csv_path = os.path.join(tmp, f"{name}.csv")
+            inflate_csv(os.path.join(args.data_dir, f"{name}.csv"), csv_path, args.rows)
+
+            for reader in ("pandas", "arrow"):
+                rows, parse_s = time_parse(csv_path, reader, args.chunksize)
+                line = f"{name:<30} {reader:<7} {rows:>10,} {parse_s:>9.3f} {rows / parse_s:>12,.0f}"
+                if args.load:
+                    _, load_s = time_load(csv_path, f"{name}_{reader}", reader, args.chunksize)
+                    line += f" {load_s:>9.3f}"
+                print(line)
+
+
+if __name__ == "__main__":
+    main()
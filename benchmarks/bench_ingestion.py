@@ -0,0 +1,132 @@
+# benchmarks/bench_ingestion.py
+"""
+Ingestion and query benchmark across scale factors.
+
+For every --scales value the datasets in data/ are generated at
+scale x 1,000 rows (see benchmarks.generate_scale_data) and, in a fresh
+process against a fresh embedded database:
+
+  1. each file is loaded with load_csv_to_sql (rows/sec per dataset),
+  2. the whole folder is loaded with ingest_all_csvs(force=True),
+  3. every SQLAgent query template is run --repeat times (median/p95 latency).
+
+Peak RSS is reported per scale factor; each one runs in its own process so
+the numbers do not carry over between scales.
+
+    python -m benchmarks.bench_ingestion --scales 1 10 100 1000
+    python -m benchmarks.bench_ingestion --scales 100 --db-uri "sqlite:///{dir}/bench.db"
+"""
+import os
+import sys
+import time
+import argparse
+import queue
+import tempfile
+import statistics
+import multiprocessing
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def _peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_scale(scale: float, data_dir: str, work_dir: str, db_uri: str, repeat: int, datasets, results):
+    # DB_URI must be set before data_ingestion.db_connector is imported.
+    os.environ["DB_URI"] = db_uri.format(dir=work_dir)
+    from sqlalchemy import text
+    from benchmarks.generate_scale_data import generate_dataset
+    from data_ingestion.csv_loader import load_csv_to_sql
+    from data_ingestion.loader_main import ingest_all_csvs
+    from data_ingestion.db_connector import get_engine
+    from sql_agent.query_templates import QUERY_TEMPLATES
+
+    folder = os.path.join(work_dir, "data")
+    start = time.perf_counter()
+    counts = generate_dataset(data_dir, folder, scale, datasets)
+    report = {"scale": scale, "generate_s": time.perf_counter() - start, "loads": {}, "queries": {}}
+
+    for name in counts:
+        start = time.perf_counter()
+        rows = load_csv_to_sql(os.path.join(folder, f"{name}.csv"), name)
+        report["loads"][name] = (rows, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    summary = ingest_all_csvs(folder, force=True)
+    report["ingest_all"] = (sum(counts.values()), time.perf_counter() - start, len(summary["failed"]))
+
+    engine = get_engine()
+    for name, sql in QUERY_TEMPLATES.items():
+        timings = []
+        try:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                with engine.connect() as conn:
+                    conn.execute(text(sql)).fetchall()
+                timings.append(time.perf_counter() - start)
+            report["queries"][name] = timings
+        except Exception as e:
+            report["queries"][name] = str(e).splitlines()[0]
+
+    report["peak_rss_mb"] = _peak_rss_mb()
+    results.put(report)
+
+
+def _print_report(report: dict):
+    print(f"\n=== scale {report['scale']:g} (generated in {report['generate_s']:.2f}s, "
+          f"peak RSS {report['peak_rss_mb']:,.0f} MB) ===")
+    print(f"{'load_csv_to_sql':<30} {'rows':>12} {'seconds':>9} {'rows/s':>12}")
+    for name, (rows, seconds) in report["loads"].items():
+        print(f"{name:<30} {rows:>12,} {seconds:>9.3f} {rows / seconds:>12,.0f}")
+    rows, seconds, failed = report["ingest_all"]
+    print(f"{'ingest_all_csvs':<30} {rows:>12,} {seconds:>9.3f} {rows / seconds:>12,.0f}"
+          + (f"  ({failed} failed)" if failed else ""))
+
+    print(f"{'query template':<30} {'median ms':>12} {'p95 ms':>9}")
+    for name, timings in report["queries"].items():
+        if isinstance(timings, str):
+            print(f"{name:<30} ❌ {timings}")
+            continue
+        ordered = sorted(timings)
+        p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+        print(f"{name:<30} {statistics.median(ordered) * 1000:>12.2f} {p95 * 1000:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--datasets", nargs="*", help="dataset names (default: all CSVs in --data-dir)")
+    parser.add_argument("--db-uri", default="sqlite:///{dir}/bench.db",
+                        help="SQLAlchemy URI; {dir} is replaced with the per-scale work directory")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query template")
+    args = parser.parse_args()
+
+    data_dir = os.path.abspath(args.data_dir)
+    ctx = multiprocessing.get_context("spawn")
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory() as work_dir:
+            results = ctx.Queue()
+            proc = ctx.Process(target=_run_scale,
+                               args=(scale, data_dir, work_dir, args.db_uri, args.repeat, args.datasets, results))
+            proc.start()
+            report = None
+            while report is None and (proc.is_alive() or not results.empty()):
+                try:
+                    report = results.get(timeout=1)
+                except queue.Empty:
+                    pass
+            proc.join()
+            if report is None:
+                print(f"❌ Scale {scale:g} failed (exit code {proc.exitcode}).")
+                continue
+            _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_intent_router.py
+"""
+Accuracy and speed of SQLAgent request routing on the labelled cases in
+benchmarks/routing_cases.jsonl ({"text": ..., "templates": [best, ...]};
+an empty list means no template fits and the request should go to NL-to-SQL).
+
+"keyword order" is the previous first-match walk over keyword lists, which
+always answers with one template (sales_performance when nothing matches);
+"scored" is sql_agent.intent_router.
+
+    python -m benchmarks.bench_intent_router --repeat 2000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sql_agent.intent_router import intent_router
+
+CASES_PATH = os.path.join(os.path.dirname(__file__), "routing_cases.jsonl")
+
+
+def keyword_order_route(request: str):
+    """The routing SQLAgent._identify_query_type did before the scored router."""
+    request_lower = request.lower()
+    if any(word in request_lower for word in ['sales', 'revenue', 'growth', 'commercial']):
+        return ["sales_performance"]
+    elif any(word in request_lower for word in ['marketing', 'roi', 'spend', 'conversion', 'leads']):
+        return ["marketing_efficiency"]
+    elif any(word in request_lower for word in ['customer', 'satisfaction', 'churn', 'retention', 'segment']):
+        return ["customer_insights"]
+    elif any(word in request_lower for word in ['product', 'rating', 'margin', 'performance']):
+        return ["product_performance"]
+    elif any(word in request_lower for word in ['financial', 'kpi', 'overview', 'total']):
+        return ["financial_overview"]
+    return ["sales_performance"]
+
+
+def load_cases(path: str = CASES_PATH):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate(route, cases):
+    """Share of cases whose best template is right, and share whose whole template set is right."""
+    best = exact = 0
+    misses = []
+    for case in cases:
+        got, want = route(case["text"]), case["templates"]
+        best += (got[:1] == want[:1])
+        exact += (set(got) == set(want))
+        if set(got) != set(want):
+            misses.append((case["text"], want, got))
+    return best / len(cases), exact / len(cases), misses
+
+
+def time_per_request(route, cases, repeat: int) -> float:
+    texts = [c["text"] for c in cases]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            route(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=1000, help="passes over the cases when timing")
+    parser.add_argument("--misses", action="store_true", help="list the cases each router gets wrong")
+    args = parser.parse_args()
+
+    cases = load_cases()
+    routers = {"keyword order": keyword_order_route, "scored": intent_router.route}
+    print(f"{len(cases)} labelled requests")
+    print(f"{'router':<14} {'best ok':>8} {'set ok':>8} {'us/request':>11}")
+    for name, route in routers.items():
+        best, exact, misses = evaluate(route, cases)
+        print(f"{name:<14} {best:>8.0%} {exact:>8.0%} {time_per_request(route, cases, args.repeat):>11.1f}")
+        if args.misses:
+            for text, want, got in misses:
+                print(f"    {text!r}: want {want}, got {got}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/bench_parquet_vs_csv.py
+"""
+Times loading each dataset from CSV versus Parquet and Arrow IPC into SQLite.
+
+Every dataset in data/ is inflated to --rows rows, written once in each
+format, and then loaded through load_csv_to_sql / load_columnar_to_sql
+into the same table name the SQLAgent templates query.
+
+    python -m benchmarks.bench_parquet_vs_csv --rows 1000000
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+from benchmarks.bench_csv_reader import inflate_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--datasets", nargs="*", help="dataset names (default: all CSVs in --data-dir)")
+    parser.add_argument("--csv-reader", default="pandas", choices=("pandas", "arrow"))
+    args = parser.parse_args()
+
+    datasets = args.datasets or sorted(os.path.splitext(f)[0] for f in os.listdir(args.data_dir) if f.endswith(".csv"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before data_ingestion.db_connector is imported.
+        os.environ["DB_URI"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from data_ingestion.csv_loader import load_csv_to_sql
+        from data_ingestion.columnar_loader import load_columnar_to_sql
+
+        results = []
+        for name in datasets:
+            csv_path = os.path.join(tmp, f"{name}.csv")
+            inflate_csv(os.path.join(args.data_dir, f"{name}.csv"), csv_path, args.rows)
+            frame = pd.read_csv(csv_path)
+            parquet_path = os.path.join(tmp, f"{name}.parquet")
+            arrow_path = os.path.join(tmp, f"{name}.arrow")
+            frame.to_parquet(parquet_path, index=False)
+            frame.to_feather(arrow_path)
+            del frame
+
+            timings = {}
+            for label, load in (
+                ("csv", lambda: load_csv_to_sql(csv_path, name, reader=args.csv_reader)),
+                ("parquet", lambda: load_columnar_to_sql(parquet_path, name)),
+                ("arrow", lambda: load_columnar_to_sql(arrow_path, name)),
+            ):
+                start = time.perf_counter()
+                load()
+                timings[label] = time.perf_counter() - start
+            results.append((name, timings))
+
+        print(f"\n{'dataset':<30} {'csv s':>8} {'parquet s':>10} {'arrow s':>8} {'csv/parquet':>12}")
+        for name, t in results:
+            print(f"{name:<30} {t['csv']:>8.3f} {t['parquet']:>10.3f} {t['arrow']:>8.3f} {t['csv'] / t['parquet']:>11.2f}x")
+
+
+if __name__ == "__main__":
+    main()
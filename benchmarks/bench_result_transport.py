@@ -0,0 +1,76 @@
+# benchmarks/bench_result_transport.py
+"""
+Cost of handing a query result from the SQL agent to the report generator.
+
+"dicts+json" is the previous path: a dict per row, json.dumps(indent=2) into
+the message and json.loads back in the recommendation agent. "frame" builds
+a DataFrame from the cursor and passes it through untouched; "frame+render"
+also renders the response once, as the judge's prompt does.
+
+    python -m benchmarks.bench_result_transport --rows 100000 200000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, text
+from sql_agent.result_transport import StructuredResponse, frame_from_result, first_record
+
+
+def _seed(engine, rows: int):
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE facts (id INTEGER, region TEXT, revenue REAL, units INTEGER, note TEXT)")
+        conn.exec_driver_sql(
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?) "
+            "INSERT INTO facts SELECT i, 'region_' || (i % 17), i * 1.25, i % 1000, 'row ' || i FROM n",
+            (rows,),
+        )
+
+
+def _dicts_json(engine):
+    with engine.connect() as conn:
+        rows = [dict(r._mapping) for r in conn.execute(text("SELECT * FROM facts")).fetchall()]
+    payload = json.dumps({"type": "structured_data", "results": [{"data": rows[0], "rows": rows}]},
+                         default=str, indent=2)
+    return json.loads(payload)["results"][0]["data"]
+
+
+def _frame(engine, render: bool = False):
+    with engine.connect() as conn:
+        frame = frame_from_result(conn.execute(text("SELECT * FROM facts")))
+    response = StructuredResponse({"type": "structured_data", "results": [{"data": first_record(frame), "frame": frame}]})
+    if render:
+        str(response)
+    return response["results"][0]["data"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = {"dicts+json": _dicts_json, "frame": _frame, "frame+render": lambda e: _frame(e, render=True)}
+    print(f"{'rows':>10} " + " ".join(f"{name:>14}" for name in paths) + "   (median ms)")
+    for rows in args.rows:
+        engine = create_engine("sqlite://")
+        _seed(engine, rows)
+        timings = {}
+        for name, path in paths.items():
+            runs = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                path(engine)
+                runs.append(time.perf_counter() - start)
+            timings[name] = statistics.median(runs) * 1000
+        print(f"{rows:>10} " + " ".join(f"{timings[name]:>14.1f}" for name in paths))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
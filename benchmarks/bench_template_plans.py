@@ -0,0 +1,74 @@
+# benchmarks/bench_template_plans.py
+"""
+Before/after timings of the SQLAgent templates at scale.
+
+The template datasets are generated at --scale x 1,000 rows and ingested into
+a throwaway SQLite database (or --db-uri), which creates the ranking-column
+indexes from the schema registry. Every template variant is then timed with
+those indexes ("after") and again once they are dropped ("before").
+
+    python -m benchmarks.bench_template_plans --scale 1000
+"""
+import os
+import sys
+import argparse
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+DATASETS = ["commercial_performance", "marketing_spend_performance", "customer_segments", "product_performance",
+            "financial_kpis"]
+
+
+def drop_ranking_indexes(engine):
+    """Drops the registry's ranking-column indexes from the template tables, keeping natural-key indexes."""
+    from sqlalchemy import Index, Table, MetaData, inspect
+    from data_ingestion.schema_registry import get_schema
+
+    inspector = inspect(engine)
+    for name in DATASETS:
+        ranking = get_schema(name).indexes
+        table = Table(name, MetaData(), autoload_with=engine)
+        for ix in inspector.get_indexes(name):
+            if ix["column_names"] in ranking:
+                with engine.begin() as conn:
+                    Index(ix["name"], *[table.c[c] for c in ix["column_names"]]).drop(conn)
+    # sqlite3's per-connection statement cache would keep serving the old EXPLAIN output.
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=100)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--db-uri", default="sqlite:///{dir}/bench.db",
+                        help="SQLAlchemy URI; {dir} is replaced with a temporary directory")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the db_connector modules are imported.
+        os.environ["DB_URI"] = args.db_uri.format(dir=tmp)
+        from benchmarks.generate_scale_data import generate_dataset
+        from data_ingestion.loader_main import ingest_all_csvs
+        from shared.db_connector import get_engine
+        from sql_agent.plan_analyzer import analyze_templates, print_report
+
+        folder = os.path.join(tmp, "data")
+        generate_dataset(args.data_dir, folder, args.scale, DATASETS)
+        ingest_all_csvs(folder, force=True)
+        engine = get_engine("writer")
+
+        after = analyze_templates(engine, args.repeat)
+
+        drop_ranking_indexes(engine)
+        before = analyze_templates(engine, args.repeat)
+
+        print(f"\n=== scale {args.scale:g}: without ranking indexes (before) ===")
+        print_report(before)
+        print(f"\n=== scale {args.scale:g}: with ranking indexes (after) ===")
+        print_report(after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# benchmarks/generate_scale_data.py
+"""
+Writes synthetic, realistically shaped copies of the datasets in data/.
+
+Each CSV is profiled once (column names, numeric types and value ranges,
+decimal places, null rates, observed categories) and then generated at
+--scale x 1,000 rows per dataset, streamed to disk in chunks so memory
+stays flat at any scale. The original sample rows come first, so template
+filters such as metric = 'Total Revenue' still match. Natural-key columns
+from the schema registry get a numeric suffix to stay unique, so the files
+also work with upsert ingestion.
+
+    python -m benchmarks.generate_scale_data --scale 1000 --out /tmp/scale_1000
+"""
+import os
+import sys
+import argparse
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+from data_ingestion.csv_loader import _normalize_name
+from data_ingestion.schema_registry import get_schema
+
+ROWS_PER_SCALE = 1000
+WRITE_CHUNK_ROWS = 200_000
+
+
+@dataclass
+class ColumnProfile:
+    name: str
+    kind: str  # int | float | category
+    low: float = 0.0
+    high: float = 0.0
+    decimals: int = 0
+    null_rate: float = 0.0
+    values: List[str] = field(default_factory=list)
+    unique_key: bool = False
+
+
+def _decimals(series: pd.Series) -> int:
+    text = series.dropna().astype(str)
+    fractions = text.str.partition(".")[2]
+    return int(fractions.str.len().max() or 0)
+
+
+def profile_csv(csv_path: str, table_name: Optional[str] = None) -> List[ColumnProfile]:
+    """Column-by-column profile of a sample CSV used to drive generation."""
+    sample = pd.read_csv(csv_path)
+    schema = get_schema(table_name or os.path.splitext(os.path.basename(csv_path))[0])
+    key = set(schema.natural_key) if schema else set()
+
+    profiles = []
+    for column in sample.columns:
+        series = sample[column]
+        null_rate = float(series.isna().mean())
+        unique_key = _normalize_name(column) in key
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            is_int = pd.api.types.is_integer_dtype(series)
+            profiles.append(ColumnProfile(
+                column, "int" if is_int else "float",
+                low=float(series.min()), high=float(series.max()),
+                decimals=0 if is_int else _decimals(series),
+                null_rate=null_rate, unique_key=unique_key,
+            ))
+        else:
+            values = series.dropna().astype(str).tolist()
+            profiles.append(ColumnProfile(column, "category", values=values, null_rate=null_rate,
+                                          unique_key=unique_key))
+    return profiles
+
+
+def _synthetic_chunk(profiles: List[ColumnProfile], start: int, rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    data = {}
+    for p in profiles:
+        if p.kind == "int":
+            column = pd.array(rng.integers(int(p.low), int(p.high) + 1, rows), dtype="Int64")
+        elif p.kind == "float":
+            column = pd.array(np.round(rng.uniform(p.low, p.high, rows), p.decimals), dtype="Float64")
+        else:
+            picks = rng.choice(p.values, rows) if p.values else np.full(rows, "", dtype=object)
+            if p.unique_key:
+                picks = [f"{value} #{n}" for value, n in zip(picks, range(start, start + rows))]
+            column = pd.array(picks, dtype="string")
+        if p.null_rate and not p.unique_key:
+            column[rng.random(rows) < p.null_rate] = pd.NA
+        data[p.name] = column
+    return pd.DataFrame(data)
+
+
+def generate_csv(source_path: str, target_path: str, rows: int, seed: int = 0,
+                 chunk_rows: int = WRITE_CHUNK_ROWS) -> int:
+    """Writes `rows` rows shaped like `source_path` to `target_path`. Returns the row count."""
+    sample = pd.read_csv(source_path)
+    profiles = profile_csv(source_path)
+    rng = np.random.default_rng(seed)
+
+    head = sample.head(rows)
+    head.to_csv(target_path, index=False)
+    written = len(head)
+    while written < rows:
+        n = min(chunk_rows, rows - written)
+        _synthetic_chunk(profiles, written, n, rng).to_csv(target_path, mode="a", header=False, index=False)
+        written += n
+    return written
+
+
+def generate_dataset(data_dir: str, out_dir: str, scale: float, datasets=None, seed: int = 0) -> dict:
+    """Generates every dataset in `data_dir` at `scale` into `out_dir`. Returns {dataset: rows}."""
+    os.makedirs(out_dir, exist_ok=True)
+    datasets = datasets or sorted(os.path.splitext(f)[0] for f in os.listdir(data_dir) if f.endswith(".csv"))
+    rows = max(1, int(scale * ROWS_PER_SCALE))
+    return {
+        name: generate_csv(os.path.join(data_dir, f"{name}.csv"), os.path.join(out_dir, f"{name}.csv"), rows, seed + i)
+        for i, name in enumerate(datasets)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=10, help=f"rows per dataset in multiples of {ROWS_PER_SCALE:,}")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--datasets", nargs="*", help="dataset names (default: all CSVs in --data-dir)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    counts = generate_dataset(args.data_dir, args.out, args.scale, args.datasets, args.seed)
+    for name, rows in counts.items():
+        print(f"✅ {name}: {rows:,} rows -> {os.path.join(args.out, name + '.csv')}")
+
+
+if __name__ == "__main__":
+    main()
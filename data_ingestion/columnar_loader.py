@@ -0,0 +1,106 @@
+# data_ingestion/columnar_loader.py
+import os
+from .csv_loader import DEFAULT_CHUNKSIZE, write_frames_to_sql, _arrow_frame, _normalize_name
+from .db_connector import get_engine
+from .schema_registry import get_schema, arrow_column_types
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARROW_IPC_EXTENSIONS = (".arrow", ".feather", ".ipc")
+COLUMNAR_EXTENSIONS = PARQUET_EXTENSIONS + ARROW_IPC_EXTENSIONS
+
+
+def is_columnar_file(file_name: str) -> bool:
+    return file_name.lower().endswith(COLUMNAR_EXTENSIONS)
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Parquet/Arrow ingestion requires pyarrow. Install it with `pip install pyarrow`.") from e
+
+
+def _projection(file_columns, table_name: str, columns=None):
+    """
+    Raw file columns to read: the requested `columns`, else the registered
+    schema's columns for known datasets, else everything.
+    """
+    if columns is not None:
+        wanted = {_normalize_name(c) for c in columns}
+    else:
+        schema = get_schema(table_name)
+        if schema is None:
+            return None
+        wanted = {c.name for c in schema.columns}
+    projected = [c for c in file_columns if _normalize_name(c) in wanted]
+    return projected or None
+
+
+def _cast_to_registry(table, table_name: str, dialect: str):
+    """Casts an Arrow table's columns to the registered schema's Arrow types."""
+    import pyarrow as pa
+
+    types = arrow_column_types(get_schema(table_name), table.column_names, _normalize_name, dialect)
+    if not types:
+        return table
+    fields = [pa.field(name, types.get(name, table.schema.field(name).type)) for name in table.column_names]
+    return table.cast(pa.schema(fields))
+
+
+def read_parquet_chunks(path: str, table_name: str, chunksize: int = None, columns=None, dialect: str = None):
+    """Yields a Parquet file as DataFrames, streaming row groups in `chunksize`-row batches with column projection."""
+    _require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    chunksize = chunksize or DEFAULT_CHUNKSIZE or 100000
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    projected = _projection(parquet_file.schema_arrow.names, table_name, columns)
+    for batch in parquet_file.iter_batches(batch_size=chunksize, columns=projected, use_threads=True):
+        yield _arrow_frame(_cast_to_registry(pa.Table.from_batches([batch]), table_name, dialect))
+
+
+def read_arrow_ipc_chunks(path: str, table_name: str, chunksize: int = None, columns=None, dialect: str = None):
+    """Yields an Arrow IPC (file or stream format) as DataFrames, memory-mapped and batch by batch."""
+    _require_pyarrow()
+    import pyarrow as pa
+
+    chunksize = chunksize or DEFAULT_CHUNKSIZE or 100000
+    with pa.memory_map(path, "r") as source:
+        try:
+            reader = pa.ipc.open_file(source)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+            file_columns = reader.schema.names
+        except pa.ArrowInvalid:
+            source.seek(0)
+            reader = pa.ipc.open_stream(source)
+            batches = iter(reader)
+            file_columns = reader.schema.names
+
+        projected = _projection(file_columns, table_name, columns)
+        for batch in batches:
+            if projected is not None:
+                batch = batch.select(projected)
+            table = pa.Table.from_batches([batch])
+            # Writers decide the batch size; re-slice oversized batches so memory stays bounded.
+            for offset in range(0, max(table.num_rows, 1), chunksize):
+                yield _arrow_frame(_cast_to_registry(table.slice(offset, chunksize), table_name, dialect))
+
+
+def load_columnar_to_sql(path: str, table_name: str, chunksize: int = None, columns=None, on_progress=None,
+                         mode: str = None):
+    """
+    Loads a Parquet or Arrow IPC file into `table_name` through the same
+    staging/swap (or append/upsert merge) path as CSVs. Only the columns the
+    table needs are read.
+    Returns the number of rows loaded.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"❌ File '{path}' not found.")
+
+    dialect = get_engine().dialect.name
+    if path.lower().endswith(PARQUET_EXTENSIONS):
+        frames = read_parquet_chunks(path, table_name, chunksize, columns, dialect)
+    else:
+        frames = read_arrow_ipc_chunks(path, table_name, chunksize, columns, dialect)
+    return write_frames_to_sql(frames, table_name, source=path, on_progress=on_progress, mode=mode)
@@ -1,23 +1,307 @@
 import pandas as pd
 import os
-from sqlalchemy import inspect
+import csv
+import io
+import time
+from itertools import chain
+from sqlalchemy import inspect, Table, Column, MetaData
 from .db_connector import get_engine
+from .schema_registry import get_schema, resolve_schema, coerce_frame, build_table, read_dtypes, arrow_column_types
+from .table_swap import staging_name, create_indexes, swap_in, merge_into, drop_staging
+from shared.table_versions import bump_table_version
+from shared.kpi_summary import staged_partials, refresh_kpis
 
-def load_csv_to_sql(csv_path: str, table_name: str):
-    if not os.path.exists(csv_path):
-        raise FileNotFoundError(f"❌ File '{csv_path}' not found.")
+# Rows per chunk in streaming mode. 0 keeps the original single-read behaviour.
+DEFAULT_CHUNKSIZE = int(os.getenv("INGEST_CHUNKSIZE", "100000"))
+# CSV parser: "pandas" (C parser) or "arrow" (multithreaded pyarrow parser, memory-mapped input).
+DEFAULT_READER = os.getenv("INGEST_CSV_READER", "pandas")
+# Bytes per block in Arrow streaming mode. Column types are inferred from the first block.
+ARROW_BLOCK_SIZE = int(os.getenv("INGEST_ARROW_BLOCK_SIZE", str(64 * 1024 * 1024)))
+READERS = ("pandas", "arrow")
+# How a load combines with an existing table. Per table via INGEST_MODE_<TABLE> (e.g. INGEST_MODE_FINANCIAL_KPIS=upsert).
+INGEST_MODES = ("replace", "append", "upsert")
+DEFAULT_MODE = os.getenv("INGEST_MODE", "replace")
+# Accepted file suffixes. Compressed files are decompressed as a stream while parsing.
+CSV_EXTENSIONS = (".csv", ".csv.gz", ".csv.zst")
+_COMPRESSION = {".gz": "gzip", ".zst": "zstd"}
+
+
+def is_csv_file(file_name: str) -> bool:
+    return file_name.lower().endswith(CSV_EXTENSIONS)
+
+
+def _compression(csv_path: str):
+    return _COMPRESSION.get(os.path.splitext(csv_path)[1].lower())
+
+
+def ingestion_mode(table_name: str, mode: str = None) -> str:
+    """Explicit `mode`, else INGEST_MODE_<TABLE>, else INGEST_MODE (default "replace")."""
+    mode = mode or os.getenv(f"INGEST_MODE_{table_name.upper()}") or DEFAULT_MODE
+    if mode not in INGEST_MODES:
+        raise ValueError(f"Unknown ingestion mode '{mode}' for '{table_name}'. Expected one of {INGEST_MODES}.")
+    return mode
+
+
+def _staging_like(engine, table_name: str, staging: str) -> Table:
+    """Staging table with the live table's exact column types, for append/upsert deltas."""
+    live = Table(table_name, MetaData(), autoload_with=engine)
+    return Table(staging, MetaData(), *[Column(c.name, c.type, nullable=c.nullable) for c in live.columns])
+
+
+def _normalize_name(col: str) -> str:
+    return col.strip().lower().replace(" ", "_")
+
+
+def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = [_normalize_name(col) for col in df.columns]
+    return df
+
+
+def _psql_copy_insert(table, conn, keys, data_iter):
+    """pandas `to_sql` insert method that streams a chunk through Postgres COPY."""
+    dbapi_conn = conn.connection
+    with dbapi_conn.cursor() as cur:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(data_iter)
+        buffer.seek(0)
+
+        columns = ", ".join(f'"{k}"' for k in keys)
+        table_name = f'"{table.schema}"."{table.name}"' if table.schema else f'"{table.name}"'
+        cur.copy_expert(f"COPY {table_name} ({columns}) FROM STDIN WITH CSV", buffer)
+
+
+def _is_arrow_backed(df: pd.DataFrame) -> bool:
+    return len(df.columns) > 0 and all(isinstance(dtype, pd.ArrowDtype) for dtype in df.dtypes)
+
+
+def _psql_copy_arrow(engine, df: pd.DataFrame, table_name: str):
+    """COPYs an Arrow-backed frame straight from its Arrow buffers, without building Python row tuples."""
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    sink = pa.BufferOutputStream()
+    pa_csv.write_csv(
+        pa.Table.from_pandas(df, preserve_index=False),
+        sink,
+        write_options=pa_csv.WriteOptions(include_header=False),
+    )
+    columns = ", ".join(f'"{c}"' for c in df.columns)
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cur:
+            cur.copy_expert(f'COPY "{table_name}" ({columns}) FROM STDIN WITH CSV', pa.BufferReader(sink.getvalue()))
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def _insert_method(engine):
+    """Pick the fastest bulk insert available for the engine's dialect."""
+    if engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2":
+        return _psql_copy_insert
+    # Multi-row VALUES; SQLite caps bound parameters so it relies on executemany instead.
+    if engine.dialect.name == "sqlite":
+        return None
+    return "multi"
+
+
+def _insert_chunksize(engine, n_columns: int):
+    """Rows per INSERT statement, kept under the driver's bound-parameter limit."""
+    if engine.dialect.name in ("mysql", "mariadb", "postgresql"):
+        return max(1, 60000 // max(n_columns, 1))
+    return None
 
-    # Read and clean CSV
-    df = pd.read_csv(csv_path)
-    df.columns = [col.strip().lower().replace(" ", "_") for col in df.columns]
 
+def _arrow_frame(table) -> pd.DataFrame:
+    """Arrow table -> DataFrame backed by the same Arrow buffers (no object-dtype copy)."""
+    return _normalize_columns(table.to_pandas(types_mapper=pd.ArrowDtype))
+
+
+def _read_csv_chunks_arrow(csv_path: str, chunksize: int, column_types: dict):
+    try:
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+    except ImportError as e:
+        raise ImportError("The 'arrow' CSV reader requires pyarrow. Install it with `pip install pyarrow`.") from e
+
+    convert_options = pa_csv.ConvertOptions(column_types=column_types)
+    compression = _compression(csv_path)
+    # Plain files are memory-mapped; compressed ones are decompressed block by block as they are read.
+    source = pa.input_stream(csv_path, compression=compression) if compression else pa.memory_map(csv_path, "r")
+    with source:
+        if not chunksize or chunksize <= 0:
+            read_options = pa_csv.ReadOptions(use_threads=True)
+            yield _arrow_frame(pa_csv.read_csv(source, read_options=read_options, convert_options=convert_options))
+            return
+
+        read_options = pa_csv.ReadOptions(use_threads=True, block_size=ARROW_BLOCK_SIZE)
+        reader = pa_csv.open_csv(source, read_options=read_options, convert_options=convert_options)
+        # Re-slice the parser's byte-sized blocks into `chunksize`-row frames.
+        pending, pending_rows = [], 0
+        try:
+            for batch in reader:
+                pending.append(batch)
+                pending_rows += batch.num_rows
+                if pending_rows < chunksize:
+                    continue
+                table = pa.Table.from_batches(pending)
+                offset = 0
+                while pending_rows - offset >= chunksize:
+                    yield _arrow_frame(table.slice(offset, chunksize))
+                    offset += chunksize
+                pending = table.slice(offset).to_batches()
+                pending_rows -= offset
+        except pa.ArrowInvalid as e:
+            raise ValueError(
+                f"Arrow reader could not convert a later block of '{csv_path}' to the types inferred "
+                f"from its first block ({e}). Raise INGEST_ARROW_BLOCK_SIZE or use the pandas reader."
+            ) from e
+        if pending_rows:
+            yield _arrow_frame(pa.Table.from_batches(pending, schema=reader.schema))
+
+
+def read_csv_chunks(csv_path: str, chunksize: int = None, reader: str = None, table_name: str = None,
+                    dialect: str = None):
+    """
+    Yields the CSV as normalized DataFrames of at most `chunksize` rows (one frame if 0),
+    parsed with the pandas C parser or the multithreaded Arrow parser. .csv.gz and
+    .csv.zst files are decompressed on the fly. When `table_name` has a registered
+    schema, columns are parsed straight into its types.
+    """
+    if chunksize is None:
+        chunksize = DEFAULT_CHUNKSIZE
+    reader = reader or DEFAULT_READER
+    if reader not in READERS:
+        raise ValueError(f"Unknown CSV reader '{reader}'. Expected one of {READERS}.")
+
+    schema = get_schema(table_name) if table_name else None
+    compression = _compression(csv_path)
+    raw_columns = pd.read_csv(csv_path, nrows=0, compression=compression).columns if schema else []
+
+    if reader == "arrow":
+        column_types = arrow_column_types(schema, raw_columns, _normalize_name, dialect) if schema else {}
+        yield from _read_csv_chunks_arrow(csv_path, chunksize, column_types)
+        return
+
+    dtype = read_dtypes(schema, raw_columns, _normalize_name, dialect) or None
+    if chunksize and chunksize > 0:
+        for df in pd.read_csv(csv_path, chunksize=chunksize, dtype=dtype, compression=compression):
+            yield _normalize_columns(df)
+    else:
+        yield _normalize_columns(pd.read_csv(csv_path, dtype=dtype, compression=compression))
+
+
+def parse_csv(csv_path: str, reader: str = None, table_name: str = None, dialect: str = None) -> pd.DataFrame:
+    """Reads a whole CSV into one normalized DataFrame. Picklable, for process pools."""
+    return next(read_csv_chunks(csv_path, chunksize=0, reader=reader, table_name=table_name, dialect=dialect))
+
+
+def write_frames_to_sql(frames, table_name: str, source: str = None, on_progress=None, mode: str = None) -> int:
+    """
+    Loads an iterable of DataFrames into `table_name` through a staging table.
+
+    - "replace": the staging table is created from the registered (or inferred)
+      compact schema, indexed, and swapped in with an atomic rename, so readers
+      never see a missing or half-loaded table.
+    - "append" / "upsert": the frames are a delta. It is staged with the live
+      table's column types and merged in one transaction (upsert matches on the
+      registry's natural key), so the cost follows the delta size.
+
+    `on_progress(table_name, "running", rows)` is called after every chunk.
+    Returns the row count.
+    """
     engine = get_engine()
+    dialect = engine.dialect.name
     inspector = inspect(engine)
+    mode = ingestion_mode(table_name, mode)
+    live_exists = inspector.has_table(table_name)
+
+    if mode != "replace" and not live_exists:
+        print(f"ℹ️ Table '{table_name}' does not exist yet — creating it instead of running {mode}.")
+        mode = "replace"
+    elif mode == "replace" and live_exists:
+        print(f"⚠️ Table '{table_name}' exists — it will be replaced once the new data is staged.")
+
+    start = time.perf_counter()
+    method = _insert_method(engine)
+
+    # Look one frame ahead: if the first frame is the whole file, inference may also declare NOT NULL.
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        print(f"⚠️ No data read from '{source or table_name}'. Table '{table_name}' left untouched.")
+        return 0
+    second = next(frames, None)
+    schema = resolve_schema(table_name, first, complete=second is None)
+
+    staging = staging_name(table_name)
+    if mode == "replace":
+        table = build_table(staging, schema, dialect)
+    else:
+        if mode == "upsert" and not schema.natural_key:
+            raise ValueError(f"Upsert into '{table_name}' needs a natural key in the schema registry.")
+        table = _staging_like(engine, table_name, staging)
+        unknown = [c for c in first.columns if c not in table.c]
+        if unknown:
+            raise ValueError(f"Columns {unknown} from '{source or table_name}' do not exist in table '{table_name}'.")
+    with engine.begin() as conn:
+        table.drop(conn, checkfirst=True)
+        table.create(conn)
+
+    total_rows = 0
+    try:
+        for df in chain([first], [] if second is None else [second], frames):
+            df = coerce_frame(df, schema, dialect)
+            if method is _psql_copy_insert and _is_arrow_backed(df):
+                _psql_copy_arrow(engine, df, staging)
+            else:
+                df.to_sql(
+                    staging,
+                    con=engine,
+                    if_exists="append",
+                    index=False,
+                    method=method,
+                    chunksize=_insert_chunksize(engine, len(df.columns)),
+                )
+            total_rows += len(df)
+            if on_progress:
+                on_progress(table_name, "running", total_rows)
 
-    # Optional: check if table exists
-    if table_name in inspector.get_table_names():
-        print(f"⚠️ Table '{table_name}' exists — it will be replaced.")
+        if mode == "replace":
+            create_indexes(engine, table, table_name, schema.indexes, schema.natural_key)
+            swap_in(engine, table_name)
+        else:
+            # An append's KPI contribution is aggregated from the delta while it is still staged.
+            delta_partials = staged_partials(engine, table_name, staging) if mode == "append" else None
+            merge_into(engine, table_name, list(first.columns), mode, schema.natural_key)
+    except Exception:
+        drop_staging(engine, table_name)
+        raise
+    # After the swap/merge, never before: cached results are keyed on this version.
+    version = bump_table_version(table_name, engine)
+
+    elapsed = time.perf_counter() - start
+    rate = total_rows / elapsed if elapsed > 0 else float("inf")
+    verb = {"replace": "created with", "append": "appended", "upsert": "upserted"}[mode]
+    print(f"✅ Table '{table_name}' {verb} {total_rows} rows from '{source or table_name}' "
+          f"in {elapsed:.2f}s ({rate:,.0f} rows/sec).")
+
+    refresh_kpis(engine, table_name, version, delta_partials if mode == "append" else None)
+    return total_rows
+
+
+def load_csv_to_sql(csv_path: str, table_name: str, chunksize: int = None, reader: str = None, on_progress=None,
+                    mode: str = None):
+    """
+    Loads a CSV file into `table_name`, replacing any existing table (or
+    appending/upserting it, per `mode` / INGEST_MODE_<TABLE>).
+    With `chunksize` > 0 the file is streamed in chunks of that many rows so
+    memory stays flat regardless of file size. `reader` selects the parser
+    ("pandas" or "arrow"; defaults to INGEST_CSV_READER). Returns the number of rows loaded.
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"❌ File '{csv_path}' not found.")
 
-    # Load to SQL
-    df.to_sql(table_name, con=engine, if_exists="replace", index=False)
-    print(f"✅ Table '{table_name}' created with {len(df)} rows from '{csv_path}'.")
+    dialect = get_engine().dialect.name
+    frames = read_csv_chunks(csv_path, chunksize, reader, table_name=table_name, dialect=dialect)
+    return write_frames_to_sql(frames, table_name, source=csv_path, on_progress=on_progress, mode=mode)
@@ -1,9 +1,6 @@
-from sqlalchemy import create_engine
-from dotenv import load_dotenv
-import os
+from shared.db_connector import get_engine as _get_shared_engine
 
-load_dotenv()
-DB_URI = os.getenv("DB_URI")
 
 def get_engine():
-    return create_engine(DB_URI)
+    """Returns the shared writer engine used for ingestion."""
+    return _get_shared_engine("writer")
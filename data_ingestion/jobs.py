@@ -0,0 +1,111 @@
+# data_ingestion/jobs.py
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+from data_ingestion.loader_main import ingest_all_csvs
+
+# Completed jobs kept for status queries before the oldest are forgotten.
+MAX_RETAINED_JOBS = 100
+
+# One worker: ingestion runs are serialized anyway, and queued jobs keep their order.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-job")
+_jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+@dataclass
+class FileProgress:
+    status: str = "pending"  # pending | running | completed | skipped | failed
+    rows_loaded: int = 0
+    started_at: Optional[float] = None
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class IngestJob:
+    id: str
+    folder_path: str
+    uploaded_files: List[str]
+    status: str = "queued"  # queued | running | completed | failed
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    files: Dict[str, FileProgress] = field(default_factory=dict)
+    summary: Optional[dict] = None
+    error: Optional[str] = None
+
+
+def _on_progress(job: IngestJob, table_name: str, status: str, rows: int = 0, error: str = None):
+    """Progress callback handed to the loader; may be called from writer threads."""
+    now = time.time()
+    with _jobs_lock:
+        progress = job.files.setdefault(table_name, FileProgress())
+        if status == "running" and progress.started_at is None:
+            progress.started_at = now
+        progress.status = status
+        progress.rows_loaded = rows or progress.rows_loaded
+        if progress.started_at is not None:
+            progress.elapsed_seconds = round(now - progress.started_at, 3)
+            if progress.elapsed_seconds > 0:
+                progress.rows_per_second = round(progress.rows_loaded / progress.elapsed_seconds, 1)
+        if error:
+            progress.error = error
+
+
+def _run(job: IngestJob):
+    with _jobs_lock:
+        job.status = "running"
+        job.started_at = time.time()
+    try:
+        summary = ingest_all_csvs(
+            job.folder_path,
+            on_progress=lambda table, status, rows=0, error=None: _on_progress(job, table, status, rows, error),
+        )
+        with _jobs_lock:
+            job.summary = summary
+            job.status = "failed" if summary["failed"] else "completed"
+    except Exception as e:
+        print(f"❌ Ingestion job {job.id} failed: {e}")
+        with _jobs_lock:
+            job.status = "failed"
+            job.error = str(e)
+    finally:
+        with _jobs_lock:
+            job.finished_at = time.time()
+
+
+def submit_ingestion(folder_path: str = "data", uploaded_files: List[str] = None) -> str:
+    """Queues a background ingestion of `folder_path` and returns its job id."""
+    job = IngestJob(id=uuid.uuid4().hex, folder_path=folder_path, uploaded_files=list(uploaded_files or []))
+    with _jobs_lock:
+        _jobs[job.id] = job
+        while len(_jobs) > MAX_RETAINED_JOBS:
+            oldest_id, oldest = next(iter(_jobs.items()))
+            if oldest.status in ("queued", "running"):
+                break
+            del _jobs[oldest_id]
+    _executor.submit(_run, job)
+    return job.id
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    """JSON-ready snapshot of a job, including per-file progress and overall throughput."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        snapshot = asdict(job)
+
+    rows_loaded = sum(f["rows_loaded"] for f in snapshot["files"].values())
+    end = snapshot["finished_at"] or time.time()
+    elapsed = end - snapshot["started_at"] if snapshot["started_at"] else 0.0
+    snapshot["rows_loaded"] = rows_loaded
+    snapshot["elapsed_seconds"] = round(elapsed, 3)
+    snapshot["rows_per_second"] = round(rows_loaded / elapsed, 1) if elapsed > 0 else 0.0
+    return snapshot
@@ -1,17 +1,188 @@
 # data_ingestion/loader_main.py
 import os
-from data_ingestion.csv_loader import load_csv_to_sql
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from sqlalchemy import inspect
+from data_ingestion.csv_loader import load_csv_to_sql, parse_csv, write_frames_to_sql, is_csv_file, CSV_EXTENSIONS
+from data_ingestion.columnar_loader import load_columnar_to_sql, is_columnar_file, COLUMNAR_EXTENSIONS
+from data_ingestion.db_connector import get_engine
+from data_ingestion.manifest import IngestManifest, file_hash
 
-def ingest_all_csvs(folder_path="data"):
-    if not os.path.exists(folder_path):
-        print(f"⚠️ Data folder '{folder_path}' not found. Skipping ingestion.")
-        return
+# Serializes folder ingestion so the upload endpoint and the watcher never
+# load the same folder (or write its manifest) at the same time.
+_ingest_lock = threading.Lock()
+
+# Processes used to parse CSVs; 1 disables the parallel path.
+PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Concurrent table writes sharing the engine's connection pool.
+WRITE_CONCURRENCY = int(os.getenv("INGEST_WRITE_CONCURRENCY", "4"))
+# Files larger than this are streamed in chunks by the writer instead of being
+# parsed whole in a worker process and shipped back.
+PARALLEL_PARSE_MAX_BYTES = int(os.getenv("INGEST_PARALLEL_PARSE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Assumed expansion of compressed CSVs when comparing against PARALLEL_PARSE_MAX_BYTES.
+COMPRESSED_SIZE_FACTOR = 10
+
+SUPPORTED_EXTENSIONS = CSV_EXTENSIONS + COLUMNAR_EXTENSIONS
+
+
+def is_supported_file(file_name: str) -> bool:
+    return is_csv_file(file_name) or is_columnar_file(file_name)
+
+
+def table_name_for(file_name: str) -> str:
+    """Table name for a data file: its base name without the data suffix (.csv, .csv.gz, .parquet, ...)."""
+    name = os.path.basename(file_name)
+    for ext in sorted(SUPPORTED_EXTENSIONS, key=len, reverse=True):
+        if name.lower().endswith(ext):
+            return name[: -len(ext)].lower()
+    return os.path.splitext(name)[0].lower()
 
-    for file in os.listdir(folder_path):
-        if file.endswith(".csv"):
-            table_name = os.path.splitext(file)[0].lower()
+
+def load_file_to_sql(path: str, table_name: str, on_progress=None, mode: str = None) -> int:
+    """Loads a CSV or a Parquet/Arrow IPC file, whichever `path` is."""
+    if is_columnar_file(path):
+        return load_columnar_to_sql(path, table_name, on_progress=on_progress, mode=mode)
+    return load_csv_to_sql(path, table_name, on_progress=on_progress, mode=mode)
+
+
+def _parsed_size_estimate(csv_path: str) -> int:
+    size = os.path.getsize(csv_path)
+    return size if csv_path.lower().endswith(".csv") else size * COMPRESSED_SIZE_FACTOR
+
+
+def _notify(on_progress, table_name: str, status: str, rows: int = 0, error: str = None):
+    if on_progress:
+        on_progress(table_name, status, rows, error)
+
+
+def _pending_files(folder_path: str, manifest: IngestManifest, existing_tables: set, force: bool, summary: dict,
+                   on_progress=None):
+    """(file, table_name, csv_path) for every CSV that needs loading; records skips in `summary`."""
+    pending = []
+    for file in sorted(os.listdir(folder_path)):
+        if is_supported_file(file):
+            table_name = table_name_for(file)
             csv_path = os.path.join(folder_path, file)
             try:
-                load_csv_to_sql(csv_path, table_name)
+                if not force and table_name in existing_tables and manifest.is_unchanged(file):
+                    summary["skipped"].append(table_name)
+                    _notify(on_progress, table_name, "skipped")
+                    continue
+            except OSError as e:
+                print(f"❌ Failed to load {csv_path}: {e}")
+                manifest.record_failure(file, str(e))
+                summary["failed"].append(table_name)
+                _notify(on_progress, table_name, "failed", error=str(e))
+                continue
+            pending.append((file, table_name, csv_path))
+            _notify(on_progress, table_name, "pending")
+    return pending
+
+
+def _load_sequential(pending, manifest: IngestManifest, summary: dict, on_progress=None, mode: str = None):
+    for file, table_name, csv_path in pending:
+        stat = None
+        try:
+            _notify(on_progress, table_name, "running")
+            stat, sha256 = os.stat(csv_path), file_hash(csv_path)
+            row_count = load_file_to_sql(csv_path, table_name, on_progress=on_progress, mode=mode)
+            manifest.record(file, table_name, row_count, sha256=sha256, stat=stat)
+            summary["ingested"].append(table_name)
+            _notify(on_progress, table_name, "completed", row_count)
+        except Exception as e:
+            print(f"❌ Failed to load {csv_path}: {e}")
+            manifest.record_failure(file, str(e), stat)
+            summary["failed"].append(table_name)
+            _notify(on_progress, table_name, "failed", error=str(e))
+
+
+def _load_parallel(pending, manifest: IngestManifest, summary: dict, parse_workers: int, write_concurrency: int,
+                   dialect: str, on_progress=None, mode: str = None):
+    """
+    Parses files in a process pool while a bounded set of writer threads
+    inserts them through the shared engine. Each file succeeds or fails on its own.
+    """
+    def write_one(csv_path, table_name, parsed, stat):
+        _notify(on_progress, table_name, "running")
+        sha256 = file_hash(csv_path)
+        if parsed is None:
+            row_count = load_file_to_sql(csv_path, table_name, on_progress=on_progress, mode=mode)
+        else:
+            row_count = write_frames_to_sql([parsed.result()], table_name, source=csv_path, on_progress=on_progress,
+                                            mode=mode)
+        return row_count, sha256, stat
+
+    # Spawned, not forked: ingestion runs inside the API process, and a fork would copy its
+    # held locks and pooled database connections into the parsers. parse_csv is module-level.
+    with ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn")) as parse_pool, \
+            ThreadPoolExecutor(max_workers=write_concurrency, thread_name_prefix="ingest-writer") as write_pool:
+        writes = {}
+        for file, table_name, csv_path in pending:
+            # Taken before loading, so a failure is recorded against the file as it was.
+            stat = os.stat(csv_path)
+            parsed = None
+            # Parquet/Arrow need no text parsing; they stream straight from the writer thread.
+            if is_csv_file(file) and _parsed_size_estimate(csv_path) <= PARALLEL_PARSE_MAX_BYTES:
+                parsed = parse_pool.submit(parse_csv, csv_path, table_name=table_name, dialect=dialect)
+            future = write_pool.submit(write_one, csv_path, table_name, parsed, stat)
+            writes[future] = (file, table_name, csv_path, stat)
+
+        for future in as_completed(writes):
+            file, table_name, csv_path, stat = writes[future]
+            try:
+                row_count, sha256, stat = future.result()
+                manifest.record(file, table_name, row_count, sha256=sha256, stat=stat)
+                summary["ingested"].append(table_name)
+                _notify(on_progress, table_name, "completed", row_count)
             except Exception as e:
-                print(f"❌ Failed to load {csv_path}: {e}")
\ No newline at end of file
+                print(f"❌ Failed to load {csv_path}: {e}")
+                manifest.record_failure(file, str(e), stat)
+                summary["failed"].append(table_name)
+                _notify(on_progress, table_name, "failed", error=str(e))
+
+
+def ingest_all_csvs(folder_path="data", force=False, parse_workers: int = None, write_concurrency: int = None,
+                    on_progress=None, mode: str = None):
+    """
+    Loads every CSV (plain, .csv.gz or .csv.zst), Parquet and Arrow IPC file in
+    `folder_path` into a table named after the file.
+    Files whose content is unchanged since the last successful load (per the
+    folder's ingestion manifest) are skipped unless `force` is set.
+    When more than one file needs loading they are parsed in parallel worker
+    processes and written with up to `write_concurrency` concurrent inserts.
+    `on_progress(table_name, status, rows, error)` receives per-file progress.
+    `mode` ("replace", "append" or "upsert") overrides the per-table
+    INGEST_MODE_<TABLE> / INGEST_MODE settings for every file.
+    Returns a summary dict of ingested, skipped and failed tables.
+    """
+    summary = {"ingested": [], "skipped": [], "failed": []}
+    if not os.path.exists(folder_path):
+        print(f"⚠️ Data folder '{folder_path}' not found. Skipping ingestion.")
+        return summary
+
+    parse_workers = parse_workers or PARSE_WORKERS
+    write_concurrency = write_concurrency or WRITE_CONCURRENCY
+
+    with _ingest_lock:
+        engine = get_engine()
+        manifest = IngestManifest(folder_path)
+        manifest.forget_missing()
+        existing_tables = set(inspect(engine).get_table_names())
+
+        # SQLite allows a single writer at a time; concurrent inserts would only hit "database is locked".
+        if engine.dialect.name == "sqlite":
+            write_concurrency = 1
+
+        pending = _pending_files(folder_path, manifest, existing_tables, force, summary, on_progress)
+        if len(pending) > 1 and parse_workers > 1:
+            _load_parallel(pending, manifest, summary, min(parse_workers, len(pending)), write_concurrency,
+                           engine.dialect.name, on_progress, mode)
+        else:
+            _load_sequential(pending, manifest, summary, on_progress, mode)
+
+        manifest.save()
+
+    if summary["skipped"]:
+        print(f"⏭️ Skipped {len(summary['skipped'])} unchanged file(s): {', '.join(summary['skipped'])}")
+    return summary
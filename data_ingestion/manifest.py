@@ -0,0 +1,137 @@
+# data_ingestion/manifest.py
+import os
+import json
+import time
+import hashlib
+import tempfile
+from datetime import datetime, timezone
+
+MANIFEST_FILENAME = ".ingest_manifest.json"
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file, read in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """
+    Tracks what has been ingested from a data folder: one entry per file with
+    its size, mtime, content hash, row count and a table version that is bumped
+    on every successful load. Files whose last load failed are kept apart, with
+    the size and mtime they failed at, so the watcher can leave them alone until
+    they change.
+    """
+
+    def __init__(self, folder_path: str):
+        self.folder_path = folder_path
+        self.path = os.path.join(folder_path, MANIFEST_FILENAME)
+        self.entries = {}
+        self.failures = {}
+        self.dirty = False
+        if os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    data = json.load(f)
+                self.entries = data.get("files", {})
+                self.failures = data.get("failed", {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable ingestion manifest '{self.path}': {e}")
+
+    def is_unchanged(self, file_name: str) -> bool:
+        """
+        True when the file matches its manifest entry. Size and mtime are checked
+        first; the content is only hashed when they differ (e.g. a re-upload of
+        identical bytes), in which case the new stat is recorded.
+        """
+        entry = self.entries.get(file_name)
+        if entry is None:
+            return False
+
+        stat = os.stat(os.path.join(self.folder_path, file_name))
+        if stat.st_size == entry["size"] and stat.st_mtime == entry["mtime"]:
+            return True
+        if stat.st_size != entry["size"]:
+            return False
+
+        if file_hash(os.path.join(self.folder_path, file_name)) == entry["sha256"]:
+            entry["mtime"] = stat.st_mtime
+            self.dirty = True
+            return True
+        return False
+
+    def failed_unchanged(self, file_name: str, retry_after: float = None) -> bool:
+        """
+        True when the file's last load failed and it has not been modified since
+        (nor, with `retry_after`, has that many seconds passed since the failure).
+        """
+        failure = self.failures.get(file_name)
+        if failure is None:
+            return False
+        if retry_after and time.time() - failure.get("failed_ts", 0) >= retry_after:
+            return False
+        stat = os.stat(os.path.join(self.folder_path, file_name))
+        return stat.st_size == failure["size"] and stat.st_mtime == failure["mtime"]
+
+    def record_failure(self, file_name: str, error: str, stat=None):
+        """Stores a failed load of the file as it was when loading started (`stat`)."""
+        try:
+            stat = stat or os.stat(os.path.join(self.folder_path, file_name))
+        except OSError:
+            return
+        self.failures[file_name] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "error": error,
+            "failed_ts": time.time(),
+            "failed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self.dirty = True
+
+    def record(self, file_name: str, table_name: str, row_count: int, sha256: str = None, stat=None):
+        """
+        Stores a successful load and bumps the table version. Pass the `stat` and
+        `sha256` taken before loading so a file rewritten mid-load is not
+        mistaken for the version that was ingested.
+        """
+        path = os.path.join(self.folder_path, file_name)
+        stat = stat or os.stat(path)
+        previous = self.entries.get(file_name, {})
+        self.entries[file_name] = {
+            "path": path,
+            "table": table_name,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": sha256 or file_hash(path),
+            "rows": row_count,
+            "table_version": previous.get("table_version", 0) + 1,
+            "ingested_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self.failures.pop(file_name, None)
+        self.dirty = True
+
+    def forget_missing(self):
+        """Drops entries whose file no longer exists in the folder."""
+        for entries in (self.entries, self.failures):
+            for file_name in list(entries):
+                if not os.path.exists(os.path.join(self.folder_path, file_name)):
+                    del entries[file_name]
+                    self.dirty = True
+
+    def save(self):
+        """Writes the manifest atomically (temp file + rename)."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder_path, prefix=".manifest-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"files": self.entries, "failed": self.failures}, f, indent=2)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,308 @@
+# data_ingestion/schema_registry.py
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy import (
+    Table, Column, MetaData, String, Text, SmallInteger, Integer, BigInteger, Float, Boolean,
+)
+
+# Column kinds understood by the registry. A trailing "!" in a declaration marks the column NOT NULL.
+KINDS = ("category", "text", "bool", "int16", "int32", "int64", "float32", "float64")
+CATEGORY_LENGTH = 64
+
+_INT_RANGES = {
+    "int16": (np.iinfo(np.int16).min, np.iinfo(np.int16).max),
+    "int32": (np.iinfo(np.int32).min, np.iinfo(np.int32).max),
+}
+
+
+@dataclass
+class ColumnSpec:
+    name: str
+    kind: str
+    nullable: bool = True
+
+
+@dataclass
+class TableSchema:
+    name: str
+    columns: List[ColumnSpec] = field(default_factory=list)
+    # Column lists to index; built on the staging table before it is swapped in.
+    indexes: List[List[str]] = field(default_factory=list)
+    # Columns identifying a row, used by the upsert ingestion mode (and indexed as unique).
+    natural_key: List[str] = field(default_factory=list)
+
+    def column(self, name: str) -> Optional[ColumnSpec]:
+        return next((c for c in self.columns if c.name == name), None)
+
+
+def _declare(name: str, columns: Dict[str, str], indexes: List[List[str]] = None,
+             natural_key: List[str] = None) -> TableSchema:
+    specs = []
+    for column, kind in columns.items():
+        nullable = not kind.endswith("!")
+        kind = kind.rstrip("!")
+        if kind not in KINDS:
+            raise ValueError(f"Unknown column kind '{kind}' for {name}.{column}")
+        specs.append(ColumnSpec(column, kind, nullable))
+    return TableSchema(name, specs, indexes or [], natural_key or [])
+
+
+# Declared schemas for the datasets shipped in data/. Amounts stay float64,
+# ratios/scores use float32, counts and durations use the smallest int that
+# holds them, and low-cardinality labels are categories. Each dataset's
+# natural key is indexed (unique where the data allows it), and so is every
+# column a SQLAgent template ranks by (ORDER BY ... DESC LIMIT 1), which turns
+# that argmax subquery from a scan and sort into an index probe.
+KNOWN_SCHEMAS: Dict[str, TableSchema] = {s.name: s for s in [
+    _declare("commercial_performance", {
+        "product_category": "category!", "revenue_current_quarter": "float64", "revenue_previous_quarter": "float64",
+        "market_share_percent": "float32", "customer_acquisition_cost": "float64", "customer_lifetime_value": "float64",
+        "conversion_rate_percent": "float32", "average_order_value": "float64", "gross_margin_percent": "float32",
+        "units_sold": "int32", "inventory_turnover": "float32", "price_elasticity": "float32",
+        "brand_awareness_percent": "float32", "customer_satisfaction_score": "float32",
+        "repeat_purchase_rate_percent": "float32", "geographic_coverage_percent": "float32",
+        "distribution_channels": "int16", "seasonal_factor": "float32", "competitive_pressure_score": "float32",
+        "innovation_score": "float32", "regulatory_compliance_score": "float32",
+    }, indexes=[["revenue_current_quarter"]], natural_key=["product_category"]),
+    _declare("competitive_analysis", {
+        "competitor": "category!", "market_share_percent": "float32", "pricing_strategy": "category",
+        "revenue_estimate": "float64", "customer_satisfaction_score": "float32", "product_quality_score": "float32",
+        "marketing_spend_estimate": "float64", "competitive_advantage": "category", "threat_level": "category",
+        "product_portfolio_breadth": "float32", "innovation_investment_percent": "float32",
+        "customer_retention_rate": "float32", "average_deal_size": "float64", "sales_cycle_days": "int16",
+        "geographic_presence": "category", "partnership_ecosystem_score": "float32",
+        "brand_recognition_score": "float32", "technical_capabilities_score": "float32",
+        "customer_support_rating": "float32", "financial_stability_score": "float32",
+        "market_growth_rate_percent": "float32", "pricing_flexibility_score": "float32",
+        "feature_completeness_score": "float32",
+    }, natural_key=["competitor"]),
+    _declare("customer_segments", {
+        "segment": "category!", "size_customers": "int32", "revenue_contribution_percent": "float32",
+        "acquisition_cost": "float64", "lifetime_value": "float64", "churn_rate_percent": "float32",
+        "satisfaction_score": "float32", "growth_rate_percent": "float32", "profitability_score": "float32",
+        "average_deal_size": "float64", "sales_cycle_days": "int16", "support_cost_per_customer": "float64",
+        "upsell_rate_percent": "float32", "cross_sell_rate_percent": "float32", "referral_rate_percent": "float32",
+        # Mixes day counts with labels such as "Net 15".
+        "payment_terms_days": "category", "contract_length_months": "int16", "renewal_rate_percent": "float32",
+        "expansion_revenue_percent": "float32", "geographic_distribution": "category", "industry_focus": "category",
+        "decision_making_complexity": "category", "budget_approval_levels": "int16",
+        "competitive_pressure_score": "float32", "price_sensitivity_score": "float32",
+        "feature_adoption_rate_percent": "float32", "training_requirements_hours": "int16",
+        "onboarding_duration_days": "int16",
+    }, indexes=[["revenue_contribution_percent"]], natural_key=["segment"]),
+    _declare("financial_kpis", {
+        "metric": "category!", "current_value": "float64", "target_value": "float64", "previous_period": "float64",
+        "variance_percent": "float32", "benchmark_industry": "float64", "performance_rating": "category",
+        "q1_value": "float64", "q2_value": "float64", "q3_value": "float64", "q4_forecast": "float64",
+        "yearly_trend": "category", "confidence_interval_lower": "float64", "confidence_interval_upper": "float64",
+        "risk_factor": "category", "impact_score": "float32", "controllability_score": "float32",
+        "measurement_frequency": "category", "data_quality_score": "float32", "stakeholder_priority": "category",
+        "improvement_initiatives": "text", "budget_allocated": "float64", "resource_requirements": "category",
+        "timeline_months": "int16", "success_probability_percent": "float32", "roi_projection": "float32",
+    }, natural_key=["metric"]),
+    _declare("marketing_spend_performance", {
+        "channel": "category!", "monthly_budget": "float64", "cost_per_lead": "float64", "leads_generated": "int32",
+        "conversion_to_customer_percent": "float32", "customer_acquisition_cost": "float64",
+        "return_on_ad_spend": "float32", "reach": "int64", "engagement_rate_percent": "float32",
+        "click_through_rate_percent": "float32", "cost_per_click": "float32", "impression_share_percent": "float32",
+        "quality_score": "float32", "brand_lift_percent": "float32", "assisted_conversions": "int32",
+        "attribution_weight": "float32", "seasonal_multiplier": "float32", "audience_overlap_percent": "float32",
+        "frequency_cap": "float32", "creative_rotation_score": "float32", "landing_page_conversion_percent": "float32",
+        "mobile_traffic_percent": "float32", "demographic_match_score": "float32",
+    }, indexes=[["return_on_ad_spend"]], natural_key=["channel"]),
+    _declare("operational_risks", {
+        "risk_category": "category!", "risk_description": "text!", "probability_percent": "float32",
+        "impact_severity": "category", "current_mitigation": "text", "mitigation_cost_annual": "float64",
+        "last_occurrence_months_ago": "int16", "financial_impact_estimate": "float64",
+        "department_responsible": "category", "monitoring_frequency": "category",
+    }, indexes=[["risk_category"]]),
+    _declare("product_performance", {
+        "product_line": "category!", "units_sold": "int32", "revenue": "float64", "profit_margin_percent": "float32",
+        "development_cost": "float64", "marketing_investment": "float64", "customer_rating": "float32",
+        "market_demand_score": "float32", "innovation_index": "float32", "support_tickets_per_unit": "float32",
+        "feature_requests": "int32", "competitive_position": "category", "time_to_market_months": "int16",
+        "r_and_d_investment": "float64", "user_adoption_rate_percent": "float32", "churn_rate_percent": "float32",
+        "upsell_potential_score": "float32", "cross_sell_opportunities": "float32",
+        "regulatory_compliance_score": "float32", "scalability_score": "float32",
+        "integration_complexity": "category", "training_requirements_hours": "int16",
+        "customer_success_score": "float32", "market_maturity_stage": "category", "pricing_elasticity": "float32",
+        "seasonal_demand_factor": "float32", "geographic_performance_variance": "float32",
+        "channel_effectiveness_score": "float32",
+    }, indexes=[["revenue"]], natural_key=["product_line"]),
+    _declare("sales_funnel_metrics", {
+        "stage": "category!", "prospects_entered": "int32", "conversion_rate_percent": "float32",
+        "average_time_days": "int16", "cost_per_stage": "float64", "drop_off_rate_percent": "float32",
+        "value_generated": "float64", "sales_velocity_score": "float32", "lead_quality_score": "float32",
+        "engagement_score": "float32", "follow_up_attempts": "float32", "channel_source": "category",
+        "geographic_region": "category", "company_size_segment": "category", "industry_vertical": "category",
+        "decision_maker_level": "category", "budget_qualification": "category", "timeline_urgency": "category",
+        "competitive_situation": "category", "pain_point_severity": "category", "solution_fit_score": "float32",
+        "trust_level_score": "float32", "objection_frequency": "float32",
+    }, natural_key=["stage"]),
+    _declare("supplier_vendor_data", {
+        "supplier_name": "category!", "category": "category", "monthly_spend": "float64",
+        "contract_length_months": "int16", "dependency_level": "category", "alternative_suppliers_available": "int16",
+        "price_increase_last_year_percent": "float32", "service_quality_score": "float32",
+        "payment_terms_days": "int16", "geographic_location": "category", "switching_cost_estimate": "float64",
+        "relationship_years": "int16",
+    }, natural_key=["supplier_name"]),
+]}
+
+
+def get_schema(table_name: str) -> Optional[TableSchema]:
+    """Declared schema for a known dataset, or None."""
+    return KNOWN_SCHEMAS.get(table_name)
+
+
+def _fits_float32(values: pd.Series, sample: int = 10000) -> bool:
+    """True when every sampled value survives a float32 round trip as written."""
+    for v in values.dropna().head(sample):
+        if float(str(np.float32(v))) != float(v):
+            return False
+    return True
+
+
+def _infer_kind(series: pd.Series, complete: bool) -> str:
+    if pd.api.types.is_bool_dtype(series):
+        return "bool"
+    # Integer columns with gaps are parsed as float; treat them as ints again.
+    ints_with_nulls = pd.api.types.is_float_dtype(series) and series.isna().any() \
+        and series.notna().any() and series.dropna().mod(1).eq(0).all()
+    if pd.api.types.is_integer_dtype(series) or ints_with_nulls:
+        non_null = series.dropna()
+        if non_null.empty:
+            return "int64"
+        # Only the first chunk has been seen: leave 10x headroom for the rest of the file.
+        headroom = 1 if complete else 10
+        low, high = non_null.min() * headroom, non_null.max() * headroom
+        for kind, (kind_min, kind_max) in _INT_RANGES.items():
+            if kind_min <= low and high <= kind_max:
+                return kind
+        return "int64"
+    # Narrow floats and short categories are only safe when every value has been seen:
+    # later chunks could need the precision, or hold longer strings than CATEGORY_LENGTH.
+    if pd.api.types.is_float_dtype(series):
+        return "float32" if complete and _fits_float32(series) else "float64"
+    non_null = series.dropna()
+    if complete and len(non_null) and non_null.nunique() <= max(1, len(non_null) // 2) \
+            and non_null.astype(str).str.len().max() <= CATEGORY_LENGTH:
+        return "category"
+    return "text"
+
+
+def infer_schema(table_name: str, df: pd.DataFrame, complete: bool = False) -> TableSchema:
+    """
+    Infers compact column kinds from a sample frame. NOT NULL is only inferred
+    when `complete` says the frame holds the whole file.
+    """
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        columns.append(ColumnSpec(name, _infer_kind(series, complete), nullable=not (complete and series.notna().all())))
+    return TableSchema(table_name, columns)
+
+
+def resolve_schema(table_name: str, df: pd.DataFrame, complete: bool = False) -> TableSchema:
+    """
+    Schema for the columns actually present in `df`: declared specs for known
+    datasets, inferred ones for anything the registry does not cover.
+    """
+    declared = get_schema(table_name)
+    inferred = infer_schema(table_name, df, complete)
+    if declared is None:
+        return inferred
+    return TableSchema(
+        table_name,
+        [declared.column(c.name) or c for c in inferred.columns],
+        declared.indexes,
+        declared.natural_key,
+    )
+
+
+def pandas_dtype(spec: ColumnSpec, dialect: str = None):
+    """DataFrame dtype for a column; None keeps what the parser produced."""
+    if spec.kind == "category":
+        return "category"
+    if spec.kind in ("int16", "int32", "int64"):
+        return spec.kind.capitalize()  # nullable Int16/Int32/Int64
+    if spec.kind == "float32":
+        # SQLite stores every REAL as 8 bytes, so narrowing would only add float32 rounding noise.
+        return "float64" if dialect == "sqlite" else "float32"
+    if spec.kind == "float64":
+        return "float64"
+    if spec.kind == "bool":
+        return "boolean"
+    return None
+
+
+def sqlalchemy_type(spec: ColumnSpec, dialect: str = None):
+    if spec.kind == "category":
+        return String(CATEGORY_LENGTH)
+    if spec.kind == "int16":
+        return SmallInteger()
+    if spec.kind == "int32":
+        return Integer()
+    if spec.kind == "int64":
+        return BigInteger()
+    if spec.kind == "float32":
+        # FLOAT(24) is a 4-byte float on Postgres and MySQL (where plain REAL means DOUBLE).
+        return Float(precision=53) if dialect == "sqlite" else Float(precision=24)
+    if spec.kind == "float64":
+        return Float(precision=53)
+    if spec.kind == "bool":
+        return Boolean()
+    return Text()
+
+
+def coerce_frame(df: pd.DataFrame, schema: TableSchema, dialect: str = None) -> pd.DataFrame:
+    """Casts a frame's columns to the schema's compact dtypes (Arrow-backed columns are left as parsed)."""
+    for spec in schema.columns:
+        if spec.name not in df.columns or isinstance(df[spec.name].dtype, pd.ArrowDtype):
+            continue
+        dtype = pandas_dtype(spec, dialect)
+        if dtype is not None and str(df[spec.name].dtype) != dtype:
+            df[spec.name] = df[spec.name].astype(dtype)
+    return df
+
+
+def build_table(table_name: str, schema: TableSchema, dialect: str = None, metadata: MetaData = None) -> Table:
+    """SQLAlchemy Table carrying the compact column types and NOT NULL constraints."""
+    return Table(
+        table_name,
+        metadata or MetaData(),
+        *[Column(spec.name, sqlalchemy_type(spec, dialect), nullable=spec.nullable) for spec in schema.columns],
+    )
+
+
+def read_dtypes(schema: Optional[TableSchema], raw_columns, normalize, dialect: str = None) -> Dict[str, str]:
+    """pd.read_csv `dtype=` mapping keyed by the file's raw header names."""
+    if schema is None:
+        return {}
+    dtypes = {}
+    for raw in raw_columns:
+        spec = schema.column(normalize(raw))
+        dtype = pandas_dtype(spec, dialect) if spec else None
+        if dtype is not None:
+            dtypes[raw] = dtype
+    return dtypes
+
+
+def arrow_column_types(schema: Optional[TableSchema], raw_columns, normalize, dialect: str = None) -> dict:
+    """pyarrow ConvertOptions `column_types=` mapping keyed by the file's raw header names."""
+    if schema is None:
+        return {}
+    import pyarrow as pa
+
+    arrow_types = {
+        "category": pa.string(), "text": pa.string(), "bool": pa.bool_(),
+        "int16": pa.int16(), "int32": pa.int32(), "int64": pa.int64(),
+        "float32": pa.float64() if dialect == "sqlite" else pa.float32(), "float64": pa.float64(),
+    }
+    types = {}
+    for raw in raw_columns:
+        spec = schema.column(normalize(raw))
+        if spec is not None:
+            types[raw] = arrow_types[spec.kind]
+    return types
@@ -0,0 +1,165 @@
+# data_ingestion/table_swap.py
+import uuid
+from sqlalchemy import Index, Table, inspect
+from sqlalchemy.exc import IntegrityError
+
+STAGING_SUFFIX = "__staging"
+RETIRED_SUFFIX = "__retired"
+_MAX_IDENTIFIER = 63  # Postgres limit; also fits MySQL (64) and SQLite
+
+
+def staging_name(table_name: str) -> str:
+    return f"{table_name}{STAGING_SUFFIX}"
+
+
+def retired_name(table_name: str) -> str:
+    return f"{table_name}{RETIRED_SUFFIX}"
+
+
+def create_indexes(engine, table: Table, live_name: str, index_columns, unique_columns=None):
+    """
+    Builds indexes on a staging table before it is swapped in. Names carry a
+    random suffix so they never clash with the live table's indexes, which
+    are dropped together with the retired table. `unique_columns` (the natural
+    key) gets a unique index, or a plain one if the data holds duplicate keys.
+    """
+    token = uuid.uuid4().hex[:8]
+    specs = [(list(unique_columns), True)] if unique_columns else []
+    specs += [(list(columns), False) for columns in index_columns if list(columns) != list(unique_columns or [])]
+    for columns, unique in specs:
+        columns = [c for c in columns if c in table.c]
+        if not columns:
+            continue
+        name = f"{'ux' if unique else 'ix'}_{live_name}_{'_'.join(columns)}"[:_MAX_IDENTIFIER - 9] + f"_{token}"
+        index = Index(name, *[table.c[c] for c in columns], unique=unique)
+        try:
+            with engine.begin() as conn:
+                index.create(conn)
+        except IntegrityError:
+            print(f"⚠️ Duplicate values in natural key {columns} of '{live_name}'; indexing it without UNIQUE.")
+            with engine.begin() as conn:
+                Index(name, *[table.c[c] for c in columns]).create(conn)
+
+
+def _quote(engine, name: str) -> str:
+    return engine.dialect.identifier_preparer.quote(name)
+
+
+def _swap_sqlite(engine, live: str, staging: str, retired: str, live_exists: bool):
+    # pysqlite does not wrap DDL in a transaction by itself, so BEGIN explicitly
+    # on the raw connection to make the two renames and the drop one atomic unit.
+    raw = engine.raw_connection()
+    dbapi_conn = raw.driver_connection
+    previous_isolation = dbapi_conn.isolation_level
+    dbapi_conn.isolation_level = None
+    try:
+        cur = dbapi_conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            cur.execute(f"DROP TABLE IF EXISTS {retired}")
+            if live_exists:
+                cur.execute(f"ALTER TABLE {live} RENAME TO {retired}")
+            cur.execute(f"ALTER TABLE {staging} RENAME TO {live}")
+            cur.execute(f"DROP TABLE IF EXISTS {retired}")
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+    finally:
+        dbapi_conn.isolation_level = previous_isolation
+        raw.close()
+
+
+def swap_in(engine, table_name: str):
+    """
+    Atomically replaces `table_name` with its staging table. Readers see either
+    the old or the new table, never a missing or partially loaded one, and the
+    swap is a metadata-only rename regardless of table size.
+    """
+    staging, retired = staging_name(table_name), retired_name(table_name)
+    live_exists = inspect(engine).has_table(table_name)
+    q_live, q_staging, q_retired = (_quote(engine, n) for n in (table_name, staging, retired))
+
+    if engine.dialect.name == "sqlite":
+        _swap_sqlite(engine, q_live, q_staging, q_retired, live_exists)
+    elif engine.dialect.name in ("mysql", "mariadb"):
+        # DDL auto-commits on MySQL, but a multi-table RENAME TABLE is itself atomic.
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {q_retired}")
+            if live_exists:
+                conn.exec_driver_sql(f"RENAME TABLE {q_live} TO {q_retired}, {q_staging} TO {q_live}")
+            else:
+                conn.exec_driver_sql(f"RENAME TABLE {q_staging} TO {q_live}")
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {q_retired}")
+    else:
+        # Postgres (and other backends with transactional DDL): one transaction.
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {q_retired}")
+            if live_exists:
+                conn.exec_driver_sql(f"ALTER TABLE {q_live} RENAME TO {q_retired}")
+            conn.exec_driver_sql(f"ALTER TABLE {q_staging} RENAME TO {q_live}")
+            if live_exists:
+                conn.exec_driver_sql(f"DROP TABLE {q_retired}")
+
+
+def _has_unique_key(engine, table_name: str, key) -> bool:
+    inspector = inspect(engine)
+    unique_sets = [ix["column_names"] for ix in inspector.get_indexes(table_name) if ix.get("unique")]
+    unique_sets += [uc["column_names"] for uc in inspector.get_unique_constraints(table_name)]
+    return any(sorted(cols) == sorted(key) for cols in unique_sets)
+
+
+def _upsert_sql(engine, live: str, staging: str, columns, key) -> str:
+    q = lambda n: _quote(engine, n)
+    cols = ", ".join(q(c) for c in columns)
+    keys = ", ".join(q(c) for c in key)
+    updates = [c for c in columns if c not in key] or list(key)
+    dialect = engine.dialect.name
+
+    if dialect in ("mysql", "mariadb"):
+        assignments = ", ".join(f"{q(c)} = s.{q(c)}" for c in updates)
+        return f"INSERT INTO {q(live)} ({cols}) SELECT {cols} FROM {q(staging)} AS s ON DUPLICATE KEY UPDATE {assignments}"
+
+    assignments = ", ".join(f"{q(c)} = excluded.{q(c)}" for c in updates)
+    if dialect == "postgresql":
+        # ON CONFLICT may not touch the same row twice in one statement, so keep one staged row per key.
+        select = f"SELECT DISTINCT ON ({keys}) {cols} FROM {q(staging)}"
+    else:
+        # "WHERE true" lets SQLite tell the upsert clause apart from a join constraint.
+        select = f"SELECT {cols} FROM {q(staging)} WHERE true"
+    return f"INSERT INTO {q(live)} ({cols}) {select} ON CONFLICT ({keys}) DO UPDATE SET {assignments}"
+
+
+def merge_into(engine, table_name: str, columns, mode: str, natural_key=None):
+    """
+    Moves the staged delta into the live table in one transaction and drops
+    the staging table. "append" inserts every staged row; "upsert" replaces
+    rows whose natural key is staged and inserts the rest, using a native
+    bulk merge when the key has a unique index and delete+insert otherwise.
+    Cost is proportional to the delta, not to the live table.
+    """
+    q = lambda n: _quote(engine, n)
+    live, staging = table_name, staging_name(table_name)
+    cols = ", ".join(q(c) for c in columns)
+    insert_all = f"INSERT INTO {q(live)} ({cols}) SELECT {cols} FROM {q(staging)}"
+
+    with engine.begin() as conn:
+        if mode == "append":
+            conn.exec_driver_sql(insert_all)
+        elif mode == "upsert":
+            if _has_unique_key(engine, live, natural_key):
+                conn.exec_driver_sql(_upsert_sql(engine, live, staging, columns, natural_key))
+            else:
+                keys = ", ".join(q(c) for c in natural_key)
+                target = keys if len(natural_key) == 1 else f"({keys})"
+                conn.exec_driver_sql(f"DELETE FROM {q(live)} WHERE {target} IN (SELECT {keys} FROM {q(staging)})")
+                conn.exec_driver_sql(insert_all)
+        else:
+            raise ValueError(f"Unknown merge mode '{mode}'.")
+        conn.exec_driver_sql(f"DROP TABLE {q(staging)}")
+
+
+def drop_staging(engine, table_name: str):
+    """Removes a leftover staging table after a failed load."""
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {_quote(engine, staging_name(table_name))}")
@@ -0,0 +1,75 @@
+# data_ingestion/watcher.py
+import os
+import time
+import threading
+from data_ingestion.loader_main import ingest_all_csvs, is_supported_file, _ingest_lock
+from data_ingestion.manifest import IngestManifest
+
+WATCH_INTERVAL_SECONDS = float(os.getenv("INGEST_WATCH_INTERVAL", "2.0"))
+# A file whose load failed is retried once it changes, or after this many seconds (0: only once it changes).
+FAILED_RETRY_SECONDS = float(os.getenv("INGEST_FAILED_RETRY_SECONDS", "600"))
+
+
+def _changed_files(folder_path: str, settle_seconds: float):
+    """
+    Data files that differ from the manifest and have not been written to
+    recently. A file whose last load failed waits until it is modified again
+    or FAILED_RETRY_SECONDS have passed.
+    """
+    changed = []
+    with _ingest_lock:
+        manifest = IngestManifest(folder_path)
+        now = time.time()
+        for file in os.listdir(folder_path):
+            if not is_supported_file(file):
+                continue
+            path = os.path.join(folder_path, file)
+            try:
+                # Let in-flight uploads finish before picking the file up.
+                if now - os.stat(path).st_mtime < settle_seconds:
+                    continue
+                if not manifest.is_unchanged(file) and not manifest.failed_unchanged(file, FAILED_RETRY_SECONDS):
+                    changed.append(file)
+            except FileNotFoundError:
+                continue
+
+        # Persist refreshed mtimes of touched-but-identical files so they are not re-hashed every poll.
+        if manifest.dirty:
+            manifest.save()
+    return changed
+
+
+def watch_folder(folder_path="data", interval: float = None, stop_event: threading.Event = None):
+    """
+    Polls `folder_path` and re-ingests whenever a data file is added or changed.
+    Unchanged files are skipped by the ingestion manifest, so each pass only
+    reloads the files that actually changed. Runs until `stop_event` is set.
+    """
+    interval = interval or WATCH_INTERVAL_SECONDS
+    stop_event = stop_event or threading.Event()
+    print(f"👀 Watching '{folder_path}' for CSV changes every {interval:.1f}s.")
+
+    while not stop_event.is_set():
+        try:
+            if os.path.exists(folder_path) and _changed_files(folder_path, settle_seconds=interval):
+                ingest_all_csvs(folder_path)
+        except Exception as e:
+            print(f"❌ Watcher ingestion pass failed: {e}")
+        stop_event.wait(interval)
+
+
+def start_watcher(folder_path="data", interval: float = None) -> threading.Event:
+    """Starts `watch_folder` on a daemon thread and returns its stop event."""
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=watch_folder,
+        args=(folder_path, interval, stop_event),
+        name="data-folder-watcher",
+        daemon=True,
+    )
+    thread.start()
+    return stop_event
+
+
+if __name__ == "__main__":
+    watch_folder()
@@ -43,12 +43,12 @@ def data_request_node(state: AgentState):
         }]
     }
 
-def sql_node(state: AgentState):
-    result = sql_agent.process_request(state)
+async def sql_node(state: AgentState):
+    result = await sql_agent.aprocess_request(state)
     return {"messages": result["messages"]}
 
 def report_generation_node(state: AgentState):
-    sql_results_string = state['messages'][-1]['content']
+    sql_results = state['messages'][-1]['content']
     iteration_count = state.get('iteration_count', 0)
     judge_feedback = state.get('judge_feedback', None)
     
@@ -57,10 +57,10 @@ def report_generation_node(state: AgentState):
     # IMPORTANT: Ensure the same SQL results are used for all iterations
     # Store the original SQL results on first iteration
     if 'original_sql_results' not in state:
-        state['original_sql_results'] = sql_results_string
+        state['original_sql_results'] = sql_results
     
     # Always use the original SQL results to ensure data consistency
-    consistent_sql_results = state.get('original_sql_results', sql_results_string)
+    consistent_sql_results = state.get('original_sql_results', sql_results)
     
     # Generate or improve report based on feedback
     if iteration_count == 0:
@@ -94,7 +94,8 @@ def judge_node(state: AgentState):
     comparison_data = ""
     for msg in state['messages']:
         if msg.get("role") == "sql_agent_response":
-            comparison_data = msg.get("content", "")
+            # The SQL agent's response is rendered to JSON here, for the judge's prompt.
+            comparison_data = str(msg.get("content", ""))
             break
 
     if not report_text or not comparison_data:
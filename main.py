@@ -4,9 +4,16 @@ from typing import List
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
-from data_ingestion.loader_main import ingest_all_csvs
+from starlette.concurrency import run_in_threadpool
+from data_ingestion.jobs import submit_ingestion, get_job
+from data_ingestion.loader_main import is_supported_file, SUPPORTED_EXTENSIONS
+from data_ingestion.watcher import start_watcher
+from shared.db_connector import pool_stats
 from graph import app as langgraph_app
 
+# Uploads are copied to disk in pieces of this size instead of being read whole into memory.
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
 # Ensure data and reports directories exist
 os.makedirs('data', exist_ok=True)
 os.makedirs('reports', exist_ok=True)
@@ -26,29 +33,70 @@ fastapi_app.add_middleware(
     allow_headers=["*"],
 )
 
-@fastapi_app.post("/upload-csv")
+@fastapi_app.on_event("startup")
+def start_data_watcher():
+    """Optionally re-ingest changed files dropped into data/ outside the API."""
+    if os.getenv("INGEST_WATCH", "false").lower() in ("1", "true", "yes"):
+        start_watcher(folder_path="data")
+
+async def _save_upload(file: UploadFile, file_path: str):
+    """Streams an upload to disk chunk by chunk; the final name only appears once it is complete."""
+    partial_path = file_path + ".part"
+    try:
+        with open(partial_path, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await run_in_threadpool(buffer.write, chunk)
+        os.replace(partial_path, file_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+@fastapi_app.post("/upload-csv", status_code=202)
 async def upload_csv(files: List[UploadFile] = File(...)):
     """
-    Uploads multiple CSV files and ingests their data into the database.
+    Uploads multiple CSV files (optionally .csv.gz / .csv.zst compressed), Parquet or
+    Arrow IPC files and queues their ingestion into the database. Files are stored as
+    uploaded; compressed CSVs are decompressed on the fly during ingestion.
+    Returns a job id immediately; poll /ingest-jobs/{job_id} for progress.
     """
     uploaded_filenames = []
     for file in files:
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(status_code=400, detail=f"Only CSV files are allowed. '{file.filename}' is not a CSV.")
+        if not is_supported_file(file.filename):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Only {', '.join(SUPPORTED_EXTENSIONS)} files are allowed. '{file.filename}' is not supported.",
+            )
 
-        file_path = os.path.join("data", file.filename)
+        file_path = os.path.join("data", os.path.basename(file.filename))
         try:
-            with open(file_path, "wb") as buffer:
-                buffer.write(await file.read())
+            await _save_upload(file, file_path)
             uploaded_filenames.append(file.filename)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to save file '{file.filename}': {e}")
-    
-    try:
-        ingest_all_csvs(folder_path="data")
-        return {"message": f"Files {uploaded_filenames} uploaded and ingested successfully."}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to ingest data into database: {e}")
+
+    job_id = submit_ingestion(folder_path="data", uploaded_files=uploaded_filenames)
+    return {
+        "message": f"Files {uploaded_filenames} uploaded. Ingestion queued.",
+        "job_id": job_id,
+        "status_url": f"/ingest-jobs/{job_id}",
+    }
+
+@fastapi_app.get("/ingest-jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    """
+    Reports the status of an ingestion job: per-file progress, rows loaded and throughput.
+    """
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found.")
+    return job
+
+@fastapi_app.get("/db-pool-stats")
+async def get_db_pool_stats():
+    """
+    Reports connection pool usage for the ingestion (writer) and agent (reader) engines.
+    """
+    return pool_stats()
 
 @fastapi_app.get("/run-workflow")
 async def run_workflow():
@@ -66,7 +114,7 @@ async def run_workflow():
 
     try:
         final_state = None
-        for state in langgraph_app.stream(initial_state, stream_mode="values"):
+        async for state in langgraph_app.astream(initial_state, stream_mode="values"):
             final_state = state
         
         if final_state and final_state.get("report_path"):
@@ -0,0 +1,183 @@
+# recommendation_agent/data_sources.py
+"""
+Where RecommendationAgent reads the tables behind its enhanced metrics.
+
+REPORT_DATA_SOURCES is an ordered, comma-separated list of sources; each table
+comes from the first source that has it:
+
+- "database": the ingested tables, through the shared reader engine. Frames are
+  kept per table and re-read only after ingestion bumps the table's version
+  (shared/table_versions.py).
+- "files": the CSV/Parquet/Arrow files in REPORT_DATA_DIR, parsed the way
+  ingestion parses them and kept until the file changes.
+- "remote": CSV downloads from REMOTE_CSV_URLS, fetched concurrently.
+
+The default, "database,files", never leaves the host.
+"""
+import os
+import io
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+import pandas as pd
+import requests
+from sqlalchemy import inspect
+from shared.db_connector import get_engine
+from shared.table_versions import get_table_versions
+
+DATA_SOURCES = os.getenv("REPORT_DATA_SOURCES", "database,files")
+DATA_DIR = os.getenv("REPORT_DATA_DIR", "data")
+# Seconds allowed per download for the "remote" source.
+REMOTE_TIMEOUT = float(os.getenv("REPORT_REMOTE_TIMEOUT", "15"))
+
+# Tables the enhanced metrics and company profile are computed from.
+REPORT_TABLES = [
+    "product_performance", "financial_kpis", "competitive_analysis", "customer_segments",
+    "commercial_performance", "marketing_spend_performance", "sales_funnel_metrics",
+]
+
+REMOTE_CSV_URLS = {
+    'product_performance': 'https://hebbkx1anhila5yf.public.blob.vercel-storage.com/product_performance-EfI5rRMJcUIca0pVlaSrfDPCOU1zqp.csv',
+    'financial_kpis': 'https://hebbkx1anhila5yf.public.blob.vercel-storage.com/financial_kpis-M7T83co0K78tQU7WwkKn41tOHxOhZW.csv',
+    'competitive_analysis': 'https://hebbkx1anhila5yf.public.blob.vercel-storage.com/competitive_analysis-gM8Zv16lIR5hRALDBAYT0H2j9C1bST.csv',
+    'customer_segments': 'https://hebbkx1anhila5yf.public.blob.vercel-storage.com/customer_segments-2pXkDtN7FYkkzZoyGUyFR38qGb4dKB.csv',
+    'commercial_performance': 'https://hebbkx1anhila5yf.public.blob.vercel-storage.com/commercial_performance-IDMtD5DY6YOdzFvTI7CQ3NN40FYx8J.csv',
+    'marketing_spend_performance': 'https://hebbkx1anhila5yf.public.blob.vercel-storage.com/marketing_spend_performance-qu3JJ2yint7wkpyEu7vvVKuTJbeC42.csv',
+    'sales_funnel_metrics': 'https://hebbkx1anhila5yf.public.blob.vercel-storage.com/sales_funnel_metrics-ZqFaWXvtu5BQC5yVwcjfNb2StQVblC.csv'
+}
+
+_FILE_SUFFIXES = (".parquet", ".pq", ".csv", ".csv.gz", ".csv.zst", ".arrow", ".feather", ".ipc")
+
+
+class DatabaseSource:
+    name = "database"
+
+    def __init__(self, engine=None):
+        self._engine = engine
+        self._frames: Dict[str, Tuple[int, pd.DataFrame]] = {}  # table -> (version, frame)
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self):
+        return self._engine or get_engine("reader")
+
+    def load(self, table_names: List[str]) -> Dict[str, pd.DataFrame]:
+        engine = self.engine
+        existing = set(inspect(engine).get_table_names())
+        wanted = [t for t in table_names if t in existing]
+        versions = get_table_versions(wanted)
+        with self._lock:
+            stale = [t for t in wanted if t not in self._frames or self._frames[t][0] != versions[t]]
+            if stale:
+                with engine.connect() as conn:
+                    for table in stale:
+                        quoted = engine.dialect.identifier_preparer.quote(table)
+                        self._frames[table] = (versions[table], pd.read_sql_query(f"SELECT * FROM {quoted}", conn))
+            return {t: self._frames[t][1] for t in wanted}
+
+
+class FileSource:
+    name = "files"
+
+    def __init__(self, data_dir: str = DATA_DIR):
+        self.data_dir = data_dir
+        self._frames: Dict[str, Tuple[tuple, pd.DataFrame]] = {}  # path -> ((mtime, size), frame)
+        self._lock = threading.Lock()
+
+    def _find_file(self, table_name: str):
+        for suffix in _FILE_SUFFIXES:
+            path = os.path.join(self.data_dir, table_name + suffix)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _read(self, path: str, table_name: str) -> pd.DataFrame:
+        # Ingestion's readers, so columns and types match the ingested tables.
+        from data_ingestion.csv_loader import is_csv_file, parse_csv
+        from data_ingestion.columnar_loader import PARQUET_EXTENSIONS, read_parquet_chunks, read_arrow_ipc_chunks
+
+        if is_csv_file(path):
+            return parse_csv(path, table_name=table_name)
+        read_chunks = read_parquet_chunks if path.lower().endswith(PARQUET_EXTENSIONS) else read_arrow_ipc_chunks
+        return pd.concat(list(read_chunks(path, table_name)), ignore_index=True)
+
+    def load(self, table_names: List[str]) -> Dict[str, pd.DataFrame]:
+        frames = {}
+        with self._lock:
+            for table in table_names:
+                path = self._find_file(table)
+                if path is None:
+                    continue
+                stat = os.stat(path)
+                stamp = (stat.st_mtime_ns, stat.st_size)
+                if path not in self._frames or self._frames[path][0] != stamp:
+                    self._frames[path] = (stamp, self._read(path, table))
+                frames[table] = self._frames[path][1]
+        return frames
+
+
+class RemoteSource:
+    name = "remote"
+
+    def __init__(self, urls: Dict[str, str] = None, timeout: float = REMOTE_TIMEOUT):
+        self.urls = REMOTE_CSV_URLS if urls is None else urls
+        self.timeout = timeout
+
+    def _fetch(self, url: str) -> pd.DataFrame:
+        response = requests.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return pd.read_csv(io.StringIO(response.text))
+
+    def load(self, table_names: List[str]) -> Dict[str, pd.DataFrame]:
+        wanted = [t for t in table_names if t in self.urls]
+        if not wanted:
+            return {}
+        frames = {}
+        with ThreadPoolExecutor(max_workers=len(wanted), thread_name_prefix="report-data") as pool:
+            futures = {table: pool.submit(self._fetch, self.urls[table]) for table in wanted}
+            for table, future in futures.items():
+                try:
+                    frames[table] = future.result()
+                except Exception as e:
+                    print(f"✗ Failed to fetch {table}: {e}")
+        return frames
+
+
+SOURCES = {"database": DatabaseSource, "files": FileSource, "remote": RemoteSource}
+
+
+def build_sources(spec: str = DATA_SOURCES) -> list:
+    """Sources named in `spec` ("database,files", ...), in order."""
+    names = [name.strip() for name in spec.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SOURCES]
+    if unknown or not names:
+        raise ValueError(f"Unknown REPORT_DATA_SOURCES entry {unknown or spec!r}. Expected some of {list(SOURCES)}.")
+    return [SOURCES[name]() for name in names]
+
+
+def load_tables(sources, table_names: List[str] = REPORT_TABLES) -> Dict[str, pd.DataFrame]:
+    """
+    {table: DataFrame} for every table in `table_names`, each from the first
+    source that has it; a table no source has maps to an empty DataFrame.
+    """
+    start = time.perf_counter()
+    frames: Dict[str, pd.DataFrame] = {}
+    for source in sources:
+        missing = [t for t in table_names if t not in frames]
+        if not missing:
+            break
+        try:
+            found = source.load(missing)
+        except Exception as e:
+            print(f"⚠️ Report data source '{source.name}' failed: {e}")
+            continue
+        for table, frame in found.items():
+            frames[table] = frame
+            print(f"✓ Loaded {table} from {source.name}: {len(frame)} rows")
+
+    for table in table_names:
+        if table not in frames:
+            print(f"✗ No data source has {table}")
+    print(f"📊 Report data: {len(frames)}/{len(table_names)} tables in {time.perf_counter() - start:.3f}s")
+    return {t: frames.get(t, pd.DataFrame()) for t in table_names}
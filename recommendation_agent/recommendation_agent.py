@@ -9,11 +9,8 @@ from reportlab.lib import colors
 import os
 import re
 import hashlib
-import requests
 import pandas as pd
-import io  # Added io import for StringIO
 import os
-import requests
 import pandas as pd
 from typing import Dict, Any, List, Optional
 from datetime import datetime
@@ -24,6 +21,7 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
+from recommendation_agent.data_sources import build_sources, load_tables
 
 class RecommendationAgent:
     def __init__(self, gemini_api_key: str = None):
@@ -41,15 +39,8 @@ class RecommendationAgent:
         self._cached_analysis = None
         self._cached_five_forces = None
         
-        self.data_urls = {
-            'product_performance': 'https://hebbkx1anhila5yf.public.blob.vercel-storage.com/product_performance-EfI5rRMJcUIca0pVlaSrfDPCOU1zqp.csv',
-            'financial_kpis': 'https://hebbkx1anhila5yf.public.blob.vercel-storage.com/financial_kpis-M7T83co0K78tQU7WwkKn41tOHxOhZW.csv',
-            'competitive_analysis': 'https://hebbkx1anhila5yf.public.blob.vercel-storage.com/competitive_analysis-gM8Zv16lIR5hRALDBAYT0H2j9C1bST.csv',
-            'customer_segments': 'https://hebbkx1anhila5yf.public.blob.vercel-storage.com/customer_segments-2pXkDtN7FYkkzZoyGUyFR38qGb4dKB.csv',
-            'commercial_performance': 'https://hebbkx1anhila5yf.public.blob.vercel-storage.com/commercial_performance-IDMtD5DY6YOdzFvTI7CQ3NN40FYx8J.csv',
-            'marketing_spend_performance': 'https://hebbkx1anhila5yf.public.blob.vercel-storage.com/marketing_spend_performance-qu3JJ2yint7wkpyEu7vvVKuTJbeC42.csv',
-            'sales_funnel_metrics': 'https://hebbkx1anhila5yf.public.blob.vercel-storage.com/sales_funnel_metrics-ZqFaWXvtu5BQC5yVwcjfNb2StQVblC.csv'
-        }
+        # Ingested database first, then data/; see data_sources.py and REPORT_DATA_SOURCES.
+        self.data_sources = build_sources()
 
     def generate_report(self, sql_results, feedback: Optional[str] = None, iteration: int = 1) -> Tuple[str, str]:
         print("Starting report generation...")
@@ -88,15 +79,9 @@ class RecommendationAgent:
         
         return pdf_path, insights
     def _fetch_csv_data(self, data_type: str) -> Optional[pd.DataFrame]:
-        """Fetch CSV data from URLs"""
-        try:
-            if data_type in self.data_urls:
-                response = requests.get(self.data_urls[data_type])
-                if response.status_code == 200:
-                    return pd.read_csv(self.data_urls[data_type])
-        except Exception as e:
-            print(f"Error fetching {data_type} data: {e}")
-        return None
+        """Fetch one report table from the configured data sources"""
+        df = load_tables(self.data_sources, [data_type])[data_type]
+        return None if df.empty else df
 
     def _process_enhanced_data(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
         """Enhanced data processing with CSV data fetching and company/industry extraction"""
@@ -104,7 +89,7 @@ class RecommendationAgent:
             csv_data = self._fetch_all_csv_data()
             
             if not csv_data or all(df.empty for df in csv_data.values()):
-                print("CSV data fetching failed, using fallback metrics")
+                print("Report data unavailable, using fallback metrics")
                 return self._get_fallback_metrics(analysis)
             
             enhanced_metrics = self._calculate_enhanced_metrics(csv_data)
@@ -140,24 +125,8 @@ class RecommendationAgent:
         return analysis
 
     def _fetch_all_csv_data(self) -> Dict[str, pd.DataFrame]:
-        """Fetch all CSV data from URLs"""
-        csv_data = {}
-        success_count = 0
-        
-        for name, url in self.data_urls.items():
-            try:
-                response = requests.get(url, timeout=15)  # Increased timeout
-                response.raise_for_status()
-                df = pd.read_csv(io.StringIO(response.text))
-                csv_data[name] = df
-                success_count += 1
-                print(f"✓ Fetched {name}: {len(df)} rows")
-            except Exception as e:
-                print(f"✗ Failed to fetch {name}: {e}")
-                csv_data[name] = pd.DataFrame()
-        
-        print(f"CSV fetch success rate: {success_count}/{len(self.data_urls)}")
-        return csv_data
+        """Fetch every report table from the configured data sources"""
+        return load_tables(self.data_sources)
 
     def _extract_company_info(self, csv_data: Dict[str, pd.DataFrame]) -> Dict[str, Any]:  # Accept csv_data parameter
         """Extract company name and industry from CSV data"""
@@ -1162,7 +1131,7 @@ FINANCIAL PROJECTIONS
                 
             return fallback_path
 
-    def improve_report_with_feedback(self, sql_results: str, judge_feedback: str, iteration: int) -> Tuple[str, str]:
+    def improve_report_with_feedback(self, sql_results, judge_feedback: str, iteration: int) -> Tuple[str, str]:
         """Improve the report based on judge feedback - FIXED VERSION"""
         print(f"🔄 Recommendation Agent: Improving report based on feedback (iteration {iteration})")
         
@@ -1186,6 +1155,8 @@ FINANCIAL PROJECTIONS
                         analysis = self._analyze_data_fallback(sql_results)
                 except json.JSONDecodeError:
                     analysis = self._analyze_data_fallback(sql_results)
+            elif isinstance(sql_results, dict) and sql_results.get("type") == "structured_data":
+                analysis = self._process_structured_data(sql_results)
             else:
                 analysis = self._analyze_data_fallback(str(sql_results))
             
@@ -0,0 +1,281 @@
+# shared/db_connector.py
+"""
+One engine registry for the whole process. Ingestion and the SQL agent ask
+for an engine by role ("writer" for ingestion, "reader" for agent queries)
+and share the pool of that role instead of each building their own.
+
+Settings come from the environment; a role-specific variable
+(DB_READER_POOL_SIZE, DB_WRITER_STATEMENT_TIMEOUT_MS, ...) overrides the
+shared one (DB_POOL_SIZE, DB_STATEMENT_TIMEOUT_MS, ...). DB_READER_URI can
+point the reader role at a replica; by default both roles use DB_URI.
+
+get_async_engine() builds the async counterpart of a role's engine on the
+matching async driver (asyncpg, aiomysql, aiosqlite), with the same settings.
+"""
+import time
+import asyncio
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+ROLES = ("writer", "reader")
+
+_DEFAULTS = {
+    "POOL_SIZE": "5",
+    "MAX_OVERFLOW": "10",
+    "POOL_TIMEOUT": "30",
+    "POOL_RECYCLE": "3600",
+    "POOL_PRE_PING": "true",
+    # 0 disables the timeout. Long bulk loads run on the writer, so only readers get one by default.
+    "STATEMENT_TIMEOUT_MS": "0",
+}
+_ROLE_DEFAULTS = {"reader": {"STATEMENT_TIMEOUT_MS": "30000"}}
+
+# Async driver per backend for get_async_engine(); DB_ASYNC_URI / DB_<ROLE>_ASYNC_URI override the derived URI.
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "mysql": "aiomysql", "mariadb": "aiomysql", "sqlite": "aiosqlite"}
+
+_engines = {}
+_async_engines = {}
+_counters = {}
+_registry_lock = threading.Lock()
+
+
+def _setting(role: str, name: str) -> str:
+    return (os.getenv(f"DB_{role.upper()}_{name}")
+            or os.getenv(f"DB_{name}")
+            or _ROLE_DEFAULTS.get(role, {}).get(name)
+            or _DEFAULTS[name])
+
+
+def _uri(role: str) -> str:
+    uri = os.getenv(f"DB_{role.upper()}_URI") or os.getenv("DB_URI")
+    if not uri:
+        raise ValueError("DB_URI not found in environment variables. Please check your .env file.")
+    return uri
+
+
+def _set_session_timeout(cursor, dialect: str, timeout_ms: int, local: bool = False):
+    if dialect == "postgresql":
+        cursor.execute(f"SET {'LOCAL ' if local else ''}statement_timeout = {int(timeout_ms)}")
+    elif dialect == "mariadb":
+        cursor.execute(f"SET SESSION max_statement_time = {timeout_ms / 1000}")
+    elif dialect == "mysql":
+        cursor.execute(f"SET SESSION max_execution_time = {int(timeout_ms)}")
+
+
+def _install_statement_timeout(engine, timeout_ms: int):
+    """
+    Per-dialect statement timeout, applied to every new connection of the pool.
+    The value is kept in the connection's info so statement_timeout() can
+    override it for a block and restore it afterwards.
+    """
+    dialect = engine.dialect.name
+
+    @event.listens_for(engine, "connect")
+    def _default_timeout(dbapi_conn, record):
+        record.info["statement_timeout_ms"] = timeout_ms
+        if timeout_ms > 0 and dialect != "sqlite":
+            cur = dbapi_conn.cursor()
+            _set_session_timeout(cur, dialect, timeout_ms)
+            cur.close()
+
+    if dialect == "sqlite" and not engine.dialect.is_async:
+        # aiosqlite connections are interrupted from the event loop instead (interrupt_after()).
+        # SQLite has no server-side timeout: a progress handler interrupts the
+        # statement once its deadline (set just before it runs) has passed.
+        @event.listens_for(engine, "connect")
+        def _sqlite_timeout(dbapi_conn, record):
+            record.info["deadline"] = None
+            dbapi_conn.set_progress_handler(
+                lambda: int(record.info["deadline"] is not None and time.monotonic() > record.info["deadline"]),
+                10000,
+            )
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _sqlite_deadline(conn, cursor, statement, parameters, context, executemany):
+            info = conn.connection.info
+            limit = info.get("statement_timeout_ms", 0)
+            info["deadline"] = time.monotonic() + limit / 1000 if limit > 0 else None
+
+
+def _apply_timeout(conn, timeout_ms: int, local: bool = False):
+    cursor = conn.connection.cursor()
+    try:
+        _set_session_timeout(cursor, conn.dialect.name, timeout_ms, local)
+    finally:
+        cursor.close()
+
+
+@contextmanager
+def statement_timeout(conn, timeout_ms: int):
+    """
+    Applies `timeout_ms` to the statements run on `conn` inside the block
+    (inside a transaction), then restores the engine's default.
+    """
+    dialect = conn.dialect.name
+    info = conn.connection.info
+    default = info.get("statement_timeout_ms", 0)
+    info["statement_timeout_ms"] = timeout_ms
+    if dialect != "sqlite":
+        # LOCAL scopes the Postgres setting to the current transaction.
+        _apply_timeout(conn, timeout_ms, local=True)
+    try:
+        yield conn
+    finally:
+        info["statement_timeout_ms"] = default
+        # An invalidated connection is discarded, not returned to the pool.
+        if dialect in ("mysql", "mariadb") and not conn.invalidated:
+            _apply_timeout(conn, default)
+
+
+@contextmanager
+def read_only(conn):
+    """
+    Makes `conn` refuse writes inside the block: a read-only transaction on
+    Postgres and MySQL (ending with the caller's transaction), query_only on
+    SQLite (restored on exit, since the setting belongs to the pooled connection).
+    """
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+    elif dialect in ("mysql", "mariadb"):
+        conn.exec_driver_sql("START TRANSACTION READ ONLY")
+    elif dialect == "sqlite":
+        conn.exec_driver_sql("PRAGMA query_only = ON")
+    try:
+        yield conn
+    finally:
+        if dialect == "sqlite" and not conn.invalidated:
+            conn.exec_driver_sql("PRAGMA query_only = OFF")
+
+
+@asynccontextmanager
+async def interrupt_after(conn, timeout_ms: int = None):
+    """
+    Statement timeout for an aiosqlite AsyncConnection: interrupts whatever
+    runs on it once `timeout_ms` (default: the engine's) has passed. Other
+    backends time out server-side and pass through unchanged.
+    """
+    if conn.dialect.name != "sqlite":
+        yield conn
+        return
+    raw = await conn.get_raw_connection()
+    timeout_ms = timeout_ms or raw.info.get("statement_timeout_ms", 0)
+    handle = None
+    if timeout_ms > 0:
+        loop = asyncio.get_running_loop()
+        handle = loop.call_later(timeout_ms / 1000, lambda: loop.create_task(raw.driver_connection.interrupt()))
+    try:
+        yield conn
+    finally:
+        if handle:
+            handle.cancel()
+
+
+def _engine_kwargs(role: str, url) -> dict:
+    kwargs = {
+        "pool_pre_ping": _setting(role, "POOL_PRE_PING").lower() in ("1", "true", "yes"),
+        "pool_recycle": int(_setting(role, "POOL_RECYCLE")),
+    }
+    # In-memory SQLite uses a per-thread singleton pool that takes no sizing arguments.
+    if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+        kwargs.update(
+            pool_size=int(_setting(role, "POOL_SIZE")),
+            max_overflow=int(_setting(role, "MAX_OVERFLOW")),
+            pool_timeout=float(_setting(role, "POOL_TIMEOUT")),
+        )
+    return kwargs
+
+
+def _instrument(engine, role: str, counters_key: str):
+    """Statement timeout and pool counters, on a sync engine or an async engine's sync_engine."""
+    _install_statement_timeout(engine, int(_setting(role, "STATEMENT_TIMEOUT_MS")))
+
+    counters = _counters[counters_key] = {"connects": 0, "checkouts": 0}
+
+    @event.listens_for(engine, "connect")
+    def _count_connect(*_):
+        counters["connects"] += 1
+
+    @event.listens_for(engine, "checkout")
+    def _count_checkout(*_):
+        counters["checkouts"] += 1
+
+
+def _build_engine(role: str):
+    uri = _uri(role)
+    engine = create_engine(uri, **_engine_kwargs(role, make_url(uri)))
+    _instrument(engine, role, role)
+    return engine
+
+
+def _async_url(role: str):
+    override = os.getenv(f"DB_{role.upper()}_ASYNC_URI") or os.getenv("DB_ASYNC_URI")
+    if override:
+        return make_url(override)
+    url = make_url(_uri(role))
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for '{backend}'. Set DB_ASYNC_URI to an async URI.")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def _build_async_engine(role: str):
+    url = _async_url(role)
+    try:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        engine = create_async_engine(url, **_engine_kwargs(role, url))
+    except ImportError as e:
+        raise ImportError(
+            f"The async {role} engine needs the '{url.get_driver_name()}' driver and greenlet. "
+            f"Install them with `pip install {url.get_driver_name()} greenlet`."
+        ) from e
+    _instrument(engine.sync_engine, role, f"{role}_async")
+    return engine
+
+
+def get_engine(role: str = "reader"):
+    """Returns the process-wide engine for `role`, creating its pool on first use."""
+    if role not in ROLES:
+        raise ValueError(f"Unknown engine role '{role}'. Expected one of {ROLES}.")
+    engine = _engines.get(role)
+    if engine is None:
+        with _registry_lock:
+            engine = _engines.get(role)
+            if engine is None:
+                engine = _engines[role] = _build_engine(role)
+    return engine
+
+
+def get_async_engine(role: str = "reader"):
+    """Returns the process-wide async engine for `role`; ImportError when its async driver is not installed."""
+    if role not in ROLES:
+        raise ValueError(f"Unknown engine role '{role}'. Expected one of {ROLES}.")
+    engine = _async_engines.get(role)
+    if engine is None:
+        with _registry_lock:
+            engine = _async_engines.get(role)
+            if engine is None:
+                engine = _async_engines[role] = _build_async_engine(role)
+    return engine
+
+
+def pool_stats() -> dict:
+    """Pool usage per created engine: size, connections in use, overflow, connects and checkouts so far."""
+    stats = {}
+    engines = list(_engines.items()) + [(f"{role}_async", e.sync_engine) for role, e in list(_async_engines.items())]
+    for role, engine in engines:
+        pool = engine.pool
+        entry = {"dialect": engine.dialect.name, "pool": type(pool).__name__, **_counters.get(role, {})}
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, name):
+                entry[name] = getattr(pool, name)()
+        entry["status"] = pool.status()
+        stats[role] = entry
+    return stats
+
@@ -0,0 +1,212 @@
+# shared/kpi_summary.py
+"""
+Precomputed KPI summary for the SQL agent's templates.
+
+Each template is declared here as a set of decomposable measures over one
+source table. Ingestion refreshes the matching rows of `kpi_summary` right
+after a table is reloaded: a full recompute after replace/upsert, and an
+incremental merge of the staged delta's partial aggregates after an append.
+The agent then answers a template with a single-row lookup, as long as the
+row was computed from the table's current version.
+"""
+import json
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, List, Optional
+from sqlalchemy import Table, Column, MetaData, String, Integer, Float, Text, select, delete, insert
+from sqlalchemy.exc import SQLAlchemyError
+from shared.db_connector import get_engine
+from shared.table_versions import get_table_versions
+
+SUMMARY_TABLE = "kpi_summary"
+
+
+@dataclass
+class Measure:
+    name: str
+    agg: str  # sum | avg | argmax
+    expr: str
+    by: Optional[str] = None  # ordering column for argmax
+    round: Optional[int] = None
+
+
+@dataclass
+class KpiSpec:
+    name: str
+    table: str
+    measures: List[Measure]
+
+
+# Mirrors sql_agent/query_templates.py, measure for measure. financial_overview is
+# left out: it is a row lookup (zero, one or several rows), not an aggregate, so
+# one stored row cannot stand in for it and the agent always queries it.
+KPI_SPECS: Dict[str, KpiSpec] = {s.name: s for s in [
+    KpiSpec("sales_performance", "commercial_performance", [
+        Measure("total_sales", "sum", "revenue_current_quarter"),
+        Measure("avg_growth_rate", "avg",
+                "(revenue_current_quarter - revenue_previous_quarter) / revenue_previous_quarter * 100", round=2),
+        Measure("top_category", "argmax", "product_category", by="revenue_current_quarter"),
+    ]),
+    KpiSpec("marketing_efficiency", "marketing_spend_performance", [
+        Measure("avg_roi", "avg", "return_on_ad_spend"),
+        Measure("total_spend", "sum", "monthly_budget"),
+        Measure("avg_conversion", "avg", "conversion_to_customer_percent"),
+        Measure("total_leads", "sum", "leads_generated"),
+        Measure("best_channel", "argmax", "channel", by="return_on_ad_spend"),
+    ]),
+    KpiSpec("customer_insights", "customer_segments", [
+        Measure("avg_satisfaction", "avg", "satisfaction_score"),
+        Measure("avg_churn", "avg", "churn_rate_percent"),
+        Measure("avg_ltv", "avg", "lifetime_value"),
+        Measure("top_segment", "argmax", "segment", by="revenue_contribution_percent"),
+    ]),
+    KpiSpec("product_performance", "product_performance", [
+        Measure("top_product", "argmax", "product_line", by="revenue"),
+        Measure("total_revenue", "sum", "revenue"),
+        Measure("avg_rating", "avg", "customer_rating"),
+        Measure("avg_margin", "avg", "profit_margin_percent"),
+    ]),
+]}
+
+_metadata = MetaData()
+_summary = Table(
+    SUMMARY_TABLE, _metadata,
+    Column("kpi_name", String(64), primary_key=True),
+    Column("source_table", String(128), nullable=False),
+    Column("source_version", Integer, nullable=False),
+    Column("payload", Text, nullable=False),
+    Column("refreshed_at", Float, nullable=False),
+)
+
+
+def specs_for_table(table_name: str) -> List[KpiSpec]:
+    return [spec for spec in KPI_SPECS.values() if spec.table == table_name]
+
+
+def _plain(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _partials(conn, spec: KpiSpec, table: str) -> dict:
+    """Partial aggregates of `spec` over `table` (the live table, or a staged delta) in one statement."""
+    q = conn.dialect.identifier_preparer.quote
+    source = q(table)
+    columns = []
+    for m in spec.measures:
+        if m.agg == "sum":
+            columns.append(f"SUM({m.expr}) AS {m.name}__sum")
+        elif m.agg == "avg":
+            columns += [f"SUM({m.expr}) AS {m.name}__sum", f"COUNT({m.expr}) AS {m.name}__count"]
+        else:
+            columns += [f"(SELECT {m.expr} FROM {source} ORDER BY {m.by} DESC LIMIT 1) AS {m.name}__arg",
+                        f"MAX({m.by}) AS {m.name}__max"]
+    row = conn.exec_driver_sql(f"SELECT {', '.join(columns)} FROM {source}").mappings().first()
+    if row is None:
+        # Aggregates always return a row; a driver that returns none gets every partial missing.
+        return {column.rsplit(" AS ", 1)[1]: None for column in columns}
+    return {k: _plain(v) for k, v in row.items()}
+
+
+def _combine(old: dict, delta: dict, spec: KpiSpec) -> dict:
+    """Merges the partial aggregates of an appended delta into the stored ones."""
+    add = lambda a, b: b if a is None else a if b is None else a + b
+    merged = dict(old)
+    for m in spec.measures:
+        if m.agg == "sum":
+            merged[f"{m.name}__sum"] = add(old[f"{m.name}__sum"], delta[f"{m.name}__sum"])
+        elif m.agg == "avg":
+            merged[f"{m.name}__sum"] = add(old[f"{m.name}__sum"], delta[f"{m.name}__sum"])
+            merged[f"{m.name}__count"] = add(old[f"{m.name}__count"], delta[f"{m.name}__count"])
+        elif m.agg == "argmax":
+            old_max, new_max = old[f"{m.name}__max"], delta[f"{m.name}__max"]
+            if new_max is not None and (old_max is None or new_max > old_max):
+                merged[f"{m.name}__max"], merged[f"{m.name}__arg"] = new_max, delta[f"{m.name}__arg"]
+    return merged
+
+
+def _finalize(state: dict, spec: KpiSpec) -> dict:
+    """Template-shaped KPI values from partial aggregates."""
+    values = {}
+    for m in spec.measures:
+        if m.agg == "sum":
+            value = state[f"{m.name}__sum"]
+        elif m.agg == "avg":
+            count = state[f"{m.name}__count"]
+            value = state[f"{m.name}__sum"] / count if count else None
+        else:
+            value = state[f"{m.name}__arg"]
+        if m.round is not None and value is not None:
+            value = round(value, m.round)
+        values[m.name] = value
+    return values
+
+
+def _stored(conn, kpi_name: str):
+    return conn.execute(
+        select(_summary.c.source_version, _summary.c.payload).where(_summary.c.kpi_name == kpi_name)
+    ).first()
+
+
+def staged_partials(engine, table_name: str, staging: str) -> dict:
+    """Partial aggregates of a staged append delta, per KPI of `table_name`."""
+    with engine.connect() as conn:
+        return {spec.name: _partials(conn, spec, staging) for spec in specs_for_table(table_name)}
+
+
+def refresh_kpis(engine, table_name: str, version: int, delta_partials: dict = None):
+    """
+    Refreshes the KPI rows computed from `table_name`, now at `version`.
+    With `delta_partials` (from staged_partials, for an append) rows that were
+    current before the append are merged incrementally; anything else is
+    recomputed from the live table. A failure removes the rows so the agent
+    falls back to querying the table.
+    """
+    specs = specs_for_table(table_name)
+    if not specs:
+        return
+    _summary.create(engine, checkfirst=True)
+    delta_partials = delta_partials or {}
+
+    for spec in specs:
+        try:
+            with engine.begin() as conn:
+                stored = _stored(conn, spec.name)
+                if spec.name in delta_partials and stored is not None and stored.source_version == version - 1:
+                    state = _combine(json.loads(stored.payload)["state"], delta_partials[spec.name], spec)
+                    how = "incrementally"
+                else:
+                    state = _partials(conn, spec, table_name)
+                    how = "fully"
+                payload = json.dumps({"values": _finalize(state, spec), "state": state}, default=str)
+                conn.execute(delete(_summary).where(_summary.c.kpi_name == spec.name))
+                conn.execute(insert(_summary).values(kpi_name=spec.name, source_table=table_name,
+                                                     source_version=version, payload=payload,
+                                                     refreshed_at=time.time()))
+            print(f"📊 KPI '{spec.name}' refreshed {how} from '{table_name}' (version {version}).")
+        except Exception as e:
+            # Whatever went wrong, the table itself is already loaded; only the summary row must go.
+            print(f"⚠️ Could not refresh KPI '{spec.name}' from '{table_name}': {e}")
+            try:
+                with engine.begin() as conn:
+                    conn.execute(delete(_summary).where(_summary.c.kpi_name == spec.name))
+            except SQLAlchemyError as e:
+                print(f"❌ Could not drop the stale KPI '{spec.name}': {e}")
+
+
+def read_kpi(kpi_name: str) -> Optional[dict]:
+    """
+    The precomputed values of `kpi_name`, or None when there is no summary row
+    or it was computed from an older version of its source table.
+    """
+    spec = KPI_SPECS.get(kpi_name)
+    if spec is None:
+        return None
+    try:
+        with get_engine("reader").connect() as conn:
+            stored = _stored(conn, kpi_name)
+    except SQLAlchemyError:
+        return None
+    if stored is None or stored.source_version != get_table_versions([spec.table])[spec.table]:
+        return None
+    return json.loads(stored.payload)["values"]
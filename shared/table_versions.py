@@ -0,0 +1,87 @@
+# shared/table_versions.py
+"""
+Per-table data versions, stored in the database itself so every process
+sees the same numbers. Ingestion bumps a table's version right after the new
+data becomes visible; caches key their entries on the versions of the
+tables a query reads, so entries go stale exactly when a table is reloaded.
+"""
+import os
+import time
+import threading
+from sqlalchemy import Table, Column, MetaData, String, Integer, Float, select, update, insert
+from sqlalchemy.exc import SQLAlchemyError
+from shared.db_connector import get_engine
+
+VERSIONS_TABLE = "_table_versions"
+# Seconds a version read from the database is trusted before it is read again.
+# Bumps made in this process are seen immediately; this only bounds how long
+# a reload done by another process can go unnoticed.
+VERSION_TTL = float(os.getenv("TABLE_VERSION_TTL", "5"))
+
+_metadata = MetaData()
+_versions = Table(
+    VERSIONS_TABLE, _metadata,
+    Column("table_name", String(128), primary_key=True),
+    Column("version", Integer, nullable=False),
+    Column("updated_at", Float, nullable=False),
+)
+
+_known = {}  # table_name -> (version, fetched_at)
+_known_lock = threading.Lock()
+_ensured = set()
+
+
+def _ensure_table(engine):
+    if engine.url not in _ensured:
+        _versions.create(engine, checkfirst=True)
+        _ensured.add(engine.url)
+
+
+def bump_table_version(table_name: str, engine=None) -> int:
+    """
+    Increments `table_name`'s version and returns it. Call it only after the
+    new data is visible to readers, so a cached result can never be stored
+    under a version newer than the data it was computed from.
+    """
+    engine = engine or get_engine("writer")
+    _ensure_table(engine)
+    now = time.time()
+    with engine.begin() as conn:
+        changed = conn.execute(
+            update(_versions)
+            .where(_versions.c.table_name == table_name)
+            .values(version=_versions.c.version + 1, updated_at=now)
+        ).rowcount
+        if not changed:
+            conn.execute(insert(_versions).values(table_name=table_name, version=1, updated_at=now))
+        version = conn.execute(select(_versions.c.version).where(_versions.c.table_name == table_name)).scalar_one()
+
+    with _known_lock:
+        _known[table_name] = (version, time.monotonic())
+    return version
+
+
+def get_table_versions(table_names) -> dict:
+    """{table_name: version} for `table_names`; tables never bumped are at version 0."""
+    table_names = set(table_names)
+    now = time.monotonic()
+    with _known_lock:
+        fresh = {t: v for t, (v, fetched) in _known.items() if t in table_names and now - fetched < VERSION_TTL}
+    missing = table_names - fresh.keys()
+    if not missing:
+        return fresh
+
+    try:
+        with get_engine("reader").connect() as conn:
+            rows = dict(conn.execute(
+                select(_versions.c.table_name, _versions.c.version).where(_versions.c.table_name.in_(missing))
+            ).all())
+    except SQLAlchemyError:
+        # Nothing has been ingested since versioning was introduced: the table does not exist yet.
+        rows = {}
+
+    with _known_lock:
+        for table in missing:
+            fresh[table] = rows.get(table, 0)
+            _known[table] = (fresh[table], now)
+    return fresh
@@ -1,67 +1,54 @@
 # sql_agent/agent.py
 import os
 import sys
-import json
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), ".")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import re
-from mistral_wrapper import run_mistral
-from db_connector import execute_sql, get_db_schema
+import pandas as pd
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from sql_agent.mistral_wrapper import run_mistral
+from sql_agent.db_connector import execute_sql, execute_sql_async, get_db_schema, get_db_schema_info, get_engine
+from sql_agent.query_templates import QUERY_TEMPLATES
+from sql_agent.result_cache import result_cache, referenced_tables, cache_key
+from sql_agent.result_transport import StructuredResponse, first_record
+from sql_agent.sql_generation import generated_sql_cache, normalize_request, schema_hash, validate_sql
+from sql_agent.intent_router import intent_router
+from shared.table_versions import get_table_versions
+from shared.kpi_summary import read_kpi
+
+# Sub-requests executed at once; keep it within the reader pool (DB_READER_POOL_SIZE + overflow).
+QUERY_CONCURRENCY = int(os.getenv("SQL_AGENT_CONCURRENCY", "4"))
+# Per-query timeout in milliseconds; 0 keeps the reader engine's DB_READER_STATEMENT_TIMEOUT_MS.
+QUERY_TIMEOUT_MS = int(os.getenv("SQL_AGENT_QUERY_TIMEOUT_MS", "0"))
+# Rows kept per query. The report uses the first row (and a short preview), so the
+# default stops after the first SQL_STREAM_BATCH_ROWS batch.
+QUERY_MAX_ROWS = int(os.getenv("SQL_AGENT_MAX_ROWS", "1000"))
+# Answer templates from the kpi_summary table maintained by ingestion.
+USE_KPI_SUMMARY = os.getenv("SQL_AGENT_USE_KPI_SUMMARY", "true").lower() in ("1", "true", "yes")
+# Requests no template fits get SQL generated by run_mistral; off, they fall back to sales_performance.
+NL_TO_SQL = os.getenv("SQL_AGENT_NL_TO_SQL", "true").lower() in ("1", "true", "yes")
+# LLM calls per request before giving up on SQL that fails validation.
+NL_SQL_ATTEMPTS = int(os.getenv("SQL_AGENT_NL_SQL_ATTEMPTS", "2"))
 
 class SQLAgent:
     def __init__(self):
-        self.db_schema = get_db_schema()
-        if not self.db_schema:
-            print("⚠️ SQL Agent Warning: Database schema is empty. Make sure data has been ingested.")
-        
+        # The schema is introspected on first use (see schema_catalog), not at startup.
+
         # Define query templates based on actual CSV structure
-        self.query_templates = {
-            "sales_performance": """
-            SELECT 
-                SUM(revenue_current_quarter) as total_sales,
-                ROUND(AVG((revenue_current_quarter - revenue_previous_quarter) / revenue_previous_quarter * 100), 2) as avg_growth_rate,
-                (SELECT product_category FROM commercial_performance ORDER BY revenue_current_quarter DESC LIMIT 1) as top_category
-            FROM commercial_performance;
-            """,
-            
-            "marketing_efficiency": """
-            SELECT 
-                AVG(return_on_ad_spend) as avg_roi,
-                SUM(monthly_budget) as total_spend,
-                AVG(conversion_to_customer_percent) as avg_conversion,
-                SUM(leads_generated) as total_leads,
-                (SELECT channel FROM marketing_spend_performance ORDER BY return_on_ad_spend DESC LIMIT 1) as best_channel
-            FROM marketing_spend_performance;
-            """,
-            
-            "customer_insights": """
-            SELECT 
-                AVG(satisfaction_score) as avg_satisfaction,
-                AVG(churn_rate_percent) as avg_churn,
-                AVG(lifetime_value) as avg_ltv,
-                (SELECT segment FROM customer_segments ORDER BY revenue_contribution_percent DESC LIMIT 1) as top_segment
-            FROM customer_segments;
-            """,
-            
-            "product_performance": """
-            SELECT 
-                (SELECT product_line FROM product_performance ORDER BY revenue DESC LIMIT 1) as top_product,
-                SUM(revenue) as total_revenue,
-                AVG(customer_rating) as avg_rating,
-                AVG(profit_margin_percent) as avg_margin
-            FROM product_performance;
-            """,
-            
-            "financial_overview": """
-            SELECT 
-                current_value as total_revenue,
-                variance_percent as growth_rate,
-                performance_rating as rating
-            FROM financial_kpis 
-            WHERE metric = 'Total Revenue';
-            """
-        }
+        self.query_templates = dict(QUERY_TEMPLATES)
+        # Templates as shipped; only these may be answered from the KPI summary.
+        self._stock_templates = dict(self.query_templates)
+
+    @property
+    def db_schema(self) -> str:
+        """Current schema text; refreshed for tables ingestion has touched since the last call."""
+        db_schema = get_db_schema()
+        if not db_schema:
+            print("⚠️ SQL Agent Warning: Database schema is empty. Make sure data has been ingested.")
+        return db_schema
 
     def _clean_sql(self, sql_string: str) -> str:
         """Cleans a single SQL query."""
@@ -69,103 +56,295 @@ class SQLAgent:
         sql_string = re.sub(r"```", "", sql_string)
         return sql_string.strip().rstrip(';')
 
-    def _identify_query_type(self, request: str) -> str:
-        """Identify which template to use based on the request"""
-        request_lower = request.lower()
-        
-        if any(word in request_lower for word in ['sales', 'revenue', 'growth', 'commercial']):
-            return "sales_performance"
-        elif any(word in request_lower for word in ['marketing', 'roi', 'spend', 'conversion', 'leads']):
-            return "marketing_efficiency"
-        elif any(word in request_lower for word in ['customer', 'satisfaction', 'churn', 'retention', 'segment']):
-            return "customer_insights"
-        elif any(word in request_lower for word in ['product', 'rating', 'margin', 'performance']):
-            return "product_performance"
-        elif any(word in request_lower for word in ['financial', 'kpi', 'overview', 'total']):
-            return "financial_overview"
-        else:
-            return "sales_performance"  # default
+    def _identify_query_types(self, request: str) -> List[str]:
+        """Templates the request asks for, best first (see intent_router); empty when none fits."""
+        return intent_router.route(request)
 
-    def process_request(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        print("🤖 SQL Agent: Processing data requests...")
-        requests_content = state["messages"][-1]["content"]
-        nl_queries = [q.strip() for q in requests_content.split("|||") if q.strip()]
+    def _identify_query_type(self, request: str) -> Optional[str]:
+        """Identify which template to use based on the request; None when no template fits."""
+        query_types = self._identify_query_types(request)
+        return query_types[0] if query_types else None
 
-        results = []
-        
-        for i, request in enumerate(nl_queries):
-            print(f"  - Processing request {i+1}: {request[:50]}...")
-            
-            # Identify query type and use appropriate template
-            query_type = self._identify_query_type(request)
-            sql_query = self.query_templates.get(query_type, self.query_templates["sales_performance"])
-            
-            print(f"    - Using template: {query_type}")
-            print(f"    - Executing: {sql_query[:100]}...")
-            
+    def _generate_sql(self, request: str, schema: str) -> Optional[str]:
+        """
+        SQL for a request no template fits: cached for the same request and
+        schema, otherwise written by run_mistral from the schema text and
+        validated (read-only, EXPLAIN dry run). None if no valid query came back.
+        """
+        engine = get_engine()
+        key = (normalize_request(request), schema_hash(schema, engine.dialect.name))
+        hit, sql_query = generated_sql_cache.get(key)
+        if hit:
+            return sql_query
+
+        prompt = (f"Database: {engine.dialect.name}\n\nSchema:\n{schema}\n"
+                  f"Write one read-only SELECT query for this {engine.dialect.name} database that answers:\n{request}")
+        for _ in range(NL_SQL_ATTEMPTS):
+            sql_query = None
             try:
-                query_result = execute_sql(sql_query)
-                
-                if isinstance(query_result, dict) and "error" in query_result:
-                    result_entry = {
-                        "request": request,
-                        "template": query_type,
-                        "status": "error",
-                        "error": query_result["error"],
-                        "sql": sql_query
-                    }
-                elif not query_result:
-                    result_entry = {
-                        "request": request,
-                        "template": query_type,
-                        "status": "no_data",
-                        "data": {}
-                    }
-                else:
-                    # Process successful result
-                    if isinstance(query_result, list) and len(query_result) > 0:
-                        data = query_result[0] if isinstance(query_result[0], dict) else {}
-                    else:
-                        data = query_result if isinstance(query_result, dict) else {}
-                    
-                    result_entry = {
-                        "request": request,
-                        "template": query_type,
-                        "status": "success",
-                        "data": data
-                    }
-                
-                results.append(result_entry)
-                print(f"    - ✅ Success: {len(str(result_entry.get('data', {})))} chars")
-                
+                sql_query = self._clean_sql(run_mistral(prompt))
+                validate_sql(engine, sql_query)
+            except ValueError as e:
+                print(f"    - ⚠️ Generated SQL rejected: {e}")
+                # A failure before any query came back (e.g. a malformed reply) just asks again.
+                if sql_query is not None:
+                    prompt += f"\n\nThis query was rejected ({e}):\n{sql_query}\nReturn a corrected query."
+                continue
             except Exception as e:
+                print(f"    - ⚠️ SQL generation failed: {e}")
+                return None
+            generated_sql_cache.put(key, sql_query)
+            return sql_query
+        return None
+
+    @staticmethod
+    def _normalize_sql(sql_query: str) -> str:
+        """Key for coalescing: the same statement modulo whitespace and trailing semicolons."""
+        return re.sub(r"\s+", " ", sql_query).strip().rstrip(";").strip()
+
+    def _execute_query(self, sql_query: str, query_type: str = None):
+        """
+        Runs one distinct query; returns its result, or the exception it raised.
+        Unmodified templates are answered from the KPI summary refreshed at
+        ingestion time when it is current, falling back to the query itself.
+        """
+        try:
+            if self._answers_from_kpi_summary(sql_query, query_type):
+                values = read_kpi(query_type)
+                if values is not None:
+                    return pd.DataFrame([values])
+            return execute_sql(sql_query, timeout_ms=QUERY_TIMEOUT_MS or None, max_rows=QUERY_MAX_ROWS,
+                               read_only=query_type == "generated")
+        except Exception as e:
+            return e
+
+    async def _aexecute_query(self, sql_query: str, query_type: str = None):
+        """_execute_query() without holding a thread while the database works."""
+        try:
+            if self._answers_from_kpi_summary(sql_query, query_type):
+                values = await asyncio.to_thread(read_kpi, query_type)
+                if values is not None:
+                    return pd.DataFrame([values])
+            return await execute_sql_async(sql_query, timeout_ms=QUERY_TIMEOUT_MS or None, max_rows=QUERY_MAX_ROWS,
+                                           read_only=query_type == "generated")
+        except Exception as e:
+            return e
+
+    def _answers_from_kpi_summary(self, sql_query: str, query_type: str) -> bool:
+        return (USE_KPI_SUMMARY and query_type in self._stock_templates
+                and self._normalize_sql(sql_query) == self._normalize_sql(self._stock_templates[query_type]))
+
+    def _result_entry(self, i: int, request: str, query_type: str, sql_query: str, query_result) -> Dict[str, Any]:
+        """Builds the result entry of one sub-request from its (possibly shared) query result."""
+        if isinstance(query_result, Exception):
+            result_entry = {
+                "request": request,
+                "template": query_type,
+                "status": "error",
+                "error": str(query_result),
+                "sql": sql_query
+            }
+        elif isinstance(query_result, dict) and "error" in query_result:
+            result_entry = {
+                "request": request,
+                "template": query_type,
+                "status": "error",
+                "error": query_result["error"],
+                "sql": sql_query
+            }
+        elif isinstance(query_result, pd.DataFrame):
+            if query_result.empty:
+                result_entry = {
+                    "request": request,
+                    "template": query_type,
+                    "status": "no_data",
+                    "data": {}
+                }
+            else:
+                # "data" is the first row, as before; "frame" keeps every row, typed, when there are more.
                 result_entry = {
                     "request": request,
                     "template": query_type,
-                    "status": "error",
-                    "error": str(e),
-                    "sql": sql_query
+                    "status": "success",
+                    "data": first_record(query_result)
                 }
-                results.append(result_entry)
-                print(f"    - ❌ Error: {e}")
+                if len(query_result) > 1:
+                    result_entry["frame"] = query_result
+                if query_result.attrs.get("truncated"):
+                    # Cut at SQL_AGENT_MAX_ROWS / SQL_MAX_BYTES; the rows are not the whole answer.
+                    result_entry["truncated"] = True
+        elif not query_result:
+            result_entry = {
+                "request": request,
+                "template": query_type,
+                "status": "no_data",
+                "data": {}
+            }
+        else:
+            # Process successful result
+            if isinstance(query_result, list) and len(query_result) > 0:
+                data = query_result[0] if isinstance(query_result[0], dict) else {}
+            else:
+                data = query_result if isinstance(query_result, dict) else {}
+
+            result_entry = {
+                "request": request,
+                "template": query_type,
+                "status": "success",
+                "data": data
+            }
+
+        if result_entry["status"] == "error":
+            print(f"    - [{i+1}] ❌ Error: {result_entry['error'][:100]}")
+        else:
+            print(f"    - [{i+1}] ✅ Success: {len(str(result_entry.get('data', {})))} chars"
+                  f"{' (truncated)' if result_entry.get('truncated') else ''}")
+        return result_entry
 
-        # Format response for recommendation agent - ensure it's JSON serializable
-        structured_response = {
+    def _plan(self, nl_queries: List[str]):
+        """
+        Resolves every request to its SQL, then groups requests that share a statement.
+        Returns the plan entries (i, request, query_type, sql_query, key) and the
+        distinct statements with their template, both keyed by normalized SQL.
+        """
+        plan = []
+        distinct_queries = {}
+        query_types = {}
+        schema = None
+        for i, request in enumerate(nl_queries):
+            print(f"  - Processing request {i+1}: {request[:50]}...")
+
+            # Identify the templates the request asks for; one request may need several
+            routed = [(query_type, self.query_templates.get(query_type, self.query_templates["sales_performance"]))
+                      for query_type in self._identify_query_types(request)]
+            if not routed and NL_TO_SQL:
+                schema = schema if schema is not None else self.db_schema
+                sql_query = self._generate_sql(request, schema)
+                if sql_query:
+                    routed = [("generated", sql_query)]
+            if not routed:
+                print(f"    - [{i+1}] No template fits; falling back to sales_performance")
+                routed = [("sales_performance", self.query_templates["sales_performance"])]
+
+            for query_type, sql_query in routed:
+                key = self._normalize_sql(sql_query)
+                plan.append((i, request, query_type, sql_query, key))
+
+                if key in distinct_queries:
+                    print(f"    - [{i+1}] Using template: {query_type} (shares the result of an identical query)")
+                else:
+                    distinct_queries[key] = sql_query
+                    query_types[key] = query_type
+                    print(f"    - [{i+1}] Using template: {query_type}")
+                    print(f"    - [{i+1}] Executing: {sql_query[:100]}...")
+        return plan, distinct_queries, query_types
+
+    def _cached_outcomes(self, distinct_queries: Dict[str, str]):
+        """Cached results of the distinct queries, and the versioned cache key of each query."""
+        # Results are cached per (query, versions of the tables it reads); a reload bumps the version.
+        outcomes, versioned_keys = {}, {}
+        if result_cache.enabled:
+            # A query naming anything that is not a known table (a function source, a name the
+            # parser got wrong) has no version to key on, so it is not cached at all.
+            known = set(name.lower() for name in get_db_schema_info())
+            tables = {key: referenced_tables(distinct_queries[key]) for key in distinct_queries}
+            keys = [key for key in distinct_queries if tables[key] and tables[key] <= known]
+            versions = get_table_versions(set().union(*(tables[key] for key in keys)))
+            for key in keys:
+                versioned_keys[key] = cache_key(key, {t: versions[t] for t in tables[key]})
+                hit, cached = result_cache.get(versioned_keys[key])
+                if hit:
+                    outcomes[key] = cached
+        return outcomes, versioned_keys
+
+    @staticmethod
+    def _store(key: str, outcome, versioned_keys: Dict[str, tuple]):
+        # Only row results are cached; errors and statement outcomes are retried next time.
+        if key in versioned_keys and isinstance(outcome, pd.DataFrame):
+            result_cache.put(versioned_keys[key], outcome)
+
+    def _respond(self, state: Dict[str, Any], nl_queries: List[str], plan, outcomes, to_run, workers: int,
+                 start: float) -> Dict[str, Any]:
+        results = [
+            self._result_entry(i, request, query_type, sql_query, outcomes[key])
+            for i, request, query_type, sql_query, key in plan
+        ]
+        # Templates answered by another template's identical query, and distinct queries answered from the cache.
+        coalesced = len(plan) - len(outcomes)
+        cache_hits = len(outcomes) - len(to_run)
+        truncated = sum(1 for r in results if r.get("truncated"))
+        print(f"  - Ran {len(to_run)} distinct quer{'y' if len(to_run) == 1 else 'ies'} for {len(plan)} routed template(s) "
+              f"with concurrency {workers} in {time.perf_counter() - start:.2f}s "
+              f"({coalesced} duplicate(s) coalesced, {cache_hits} served from cache)")
+
+        # Format response for recommendation agent. It stays a dict holding the result frames;
+        # str() renders it as JSON, and only the consumers that need text (prompts, logs) call it.
+        structured_response = StructuredResponse({
             "type": "structured_data",
             "results": results,
-            "summary": f"Processed {len(results)} requests, {sum(1 for r in results if r['status'] == 'success')} successful"
-        }
-
-        # Convert to string to avoid serialization issues
-        response_content = json.dumps(structured_response, default=str, indent=2)
+            "coalesced": coalesced,
+            "cache_hits": cache_hits,
+            "summary": f"Processed {len(nl_queries)} requests into {len(results)} template results, {sum(1 for r in results if r['status'] == 'success')} successful, "
+                       f"{coalesced} duplicate query execution(s) saved, {cache_hits} result(s) served from cache"
+                       + (f", {truncated} result(s) truncated at the row/byte cap (partial data)" if truncated else "")
+        })
 
         return {
             "messages": state["messages"] + [{
                 "role": "sql_agent_response",
-                "content": response_content
+                "content": structured_response
             }]
         }
 
+    def process_request(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        print("🤖 SQL Agent: Processing data requests...")
+        requests_content = state["messages"][-1]["content"]
+        nl_queries = [q.strip() for q in requests_content.split("|||") if q.strip()]
+
+        plan, distinct_queries, query_types = self._plan(nl_queries)
+        start = time.perf_counter()
+        outcomes, versioned_keys = self._cached_outcomes(distinct_queries)
+        to_run = [key for key in distinct_queries if key not in outcomes]
+
+        # Distinct queries run concurrently, each on its own pooled connection, so the
+        # stage takes about as long as the slowest query.
+        workers = max(1, min(QUERY_CONCURRENCY, len(to_run)))
+        if to_run:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sql-agent") as pool:
+                runs = pool.map(self._execute_query, [distinct_queries[k] for k in to_run], [query_types[k] for k in to_run])
+                for key, outcome in zip(to_run, runs):
+                    outcomes[key] = outcome
+                    self._store(key, outcome, versioned_keys)
+
+        return self._respond(state, nl_queries, plan, outcomes, to_run, workers, start)
+
+    async def aprocess_request(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        process_request() for async callers. Queries run on the async engine
+        (see db_connector.execute_sql_async), at most SQL_AGENT_CONCURRENCY at
+        once; planning and the cache lookup, which may call the LLM or read table
+        versions, run in a worker thread.
+        """
+        print("🤖 SQL Agent: Processing data requests...")
+        requests_content = state["messages"][-1]["content"]
+        nl_queries = [q.strip() for q in requests_content.split("|||") if q.strip()]
+
+        plan, distinct_queries, query_types = await asyncio.to_thread(self._plan, nl_queries)
+        start = time.perf_counter()
+        outcomes, versioned_keys = await asyncio.to_thread(self._cached_outcomes, distinct_queries)
+        to_run = [key for key in distinct_queries if key not in outcomes]
+
+        workers = max(1, min(QUERY_CONCURRENCY, len(to_run)))
+        slots = asyncio.Semaphore(workers)
+
+        async def run(key):
+            async with slots:
+                outcomes[key] = await self._aexecute_query(distinct_queries[key], query_types[key])
+            self._store(key, outcomes[key], versioned_keys)
+
+        await asyncio.gather(*(run(key) for key in to_run))
+        return self._respond(state, nl_queries, plan, outcomes, to_run, workers, start)
+
     def get_available_metrics(self) -> Dict[str, List[str]]:
         """Return available metrics from each table for debugging"""
         return {
@@ -0,0 +1,178 @@
+# sql_agent/columnar_engine.py
+"""
+Optional embedded columnar engine (DuckDB) for the agent's analytical queries.
+
+With SQL_AGENT_ENGINE=duckdb, execute_sql runs queries on an in-process DuckDB
+database instead of the configured server. The tables a query reads are
+loaded on first use, either from the ingested database (DUCKDB_SOURCE=database)
+or straight from the CSV/Parquet/Arrow files in DUCKDB_DATA_DIR
+(DUCKDB_SOURCE=files). Each loaded table remembers its ingestion version
+(shared/table_versions.py) and is reloaded once ingestion bumps it.
+"""
+import os
+import threading
+from typing import Dict
+import pandas as pd
+from shared.db_connector import get_engine
+from shared.table_versions import get_table_versions
+from sql_agent.result_cache import referenced_tables
+
+# "database" copies tables from the ingested database; "files" reads data/ directly.
+SOURCE = os.getenv("DUCKDB_SOURCE", "database")
+DATA_DIR = os.getenv("DUCKDB_DATA_DIR", "data")
+# Rows per batch when copying a table out of the ingested database.
+COPY_CHUNK_ROWS = int(os.getenv("DUCKDB_COPY_CHUNK_ROWS", "200000"))
+# DuckDB worker threads; 0 lets DuckDB use every core.
+THREADS = int(os.getenv("DUCKDB_THREADS", "0"))
+
+_LOADING_SUFFIX = "__loading"
+_FILE_SUFFIXES = (".parquet", ".pq", ".csv", ".csv.gz", ".csv.zst", ".arrow", ".feather", ".ipc")
+
+
+def _require_duckdb():
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("SQL_AGENT_ENGINE=duckdb requires duckdb. Install it with `pip install duckdb`.") from e
+    return duckdb
+
+
+def _normalized(name: str) -> str:
+    # Same rule as data_ingestion.csv_loader._normalize_name, so file columns match the ingested tables.
+    return name.strip().lower().replace(" ", "_")
+
+
+class ColumnarEngine:
+    def __init__(self, source: str = SOURCE, data_dir: str = DATA_DIR):
+        duckdb = _require_duckdb()
+        if source not in ("database", "files"):
+            raise ValueError(f"Unknown DUCKDB_SOURCE '{source}'. Expected 'database' or 'files'.")
+        self.source = source
+        self.data_dir = data_dir
+        self._con = duckdb.connect(":memory:")
+        if THREADS:
+            self._con.execute(f"SET threads = {THREADS}")
+        self._loaded: Dict[str, int] = {}  # table -> ingestion version it was loaded at
+        self._load_lock = threading.Lock()
+
+    def _find_file(self, table_name: str):
+        for suffix in _FILE_SUFFIXES:
+            path = os.path.join(self.data_dir, table_name + suffix)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _load_from_file(self, con, table_name: str, target: str):
+        path = self._find_file(table_name)
+        if path is None:
+            raise FileNotFoundError(f"No data file for table '{table_name}' in '{self.data_dir}'.")
+        lower, literal = path.lower(), "'" + path.replace("'", "''") + "'"
+        if lower.endswith((".parquet", ".pq")):
+            con.execute(f"CREATE OR REPLACE TEMP VIEW _source AS SELECT * FROM read_parquet({literal})")
+        elif ".csv" in lower:
+            con.execute(f"CREATE OR REPLACE TEMP VIEW _source AS SELECT * FROM read_csv_auto({literal})")
+        else:
+            import pyarrow.feather as feather
+
+            arrow_table = feather.read_table(path)
+            con.register("_arrow_source", arrow_table)
+            con.execute("CREATE OR REPLACE TEMP VIEW _source AS SELECT * FROM _arrow_source")
+        columns = [row[0] for row in con.execute("DESCRIBE _source").fetchall()]
+        select = ", ".join(f'"{c}" AS "{_normalized(c)}"' for c in columns)
+        con.execute(f'CREATE OR REPLACE TABLE "{target}" AS SELECT {select} FROM _source')
+        con.execute("DROP VIEW _source")
+
+    def _load_from_database(self, con, table_name: str, target: str):
+        engine = get_engine("reader")
+        quoted = engine.dialect.identifier_preparer.quote(table_name)
+        first = True
+        for chunk in pd.read_sql_query(f"SELECT * FROM {quoted}", engine, chunksize=COPY_CHUNK_ROWS,
+                                       dtype_backend="pyarrow"):
+            con.register("_chunk", chunk)
+            if first:
+                con.execute(f'CREATE OR REPLACE TABLE "{target}" AS SELECT * FROM _chunk')
+                first = False
+            else:
+                con.execute(f'INSERT INTO "{target}" SELECT * FROM _chunk')
+            con.unregister("_chunk")
+        if first:
+            con.execute(f'DROP TABLE IF EXISTS "{target}"')
+            raise LookupError(f"Table '{table_name}' is empty or missing in the ingested database.")
+
+    def ensure_loaded(self, table_names):
+        """Loads (or reloads) every table in `table_names` whose ingestion version has moved on."""
+        versions = get_table_versions(table_names)
+        stale = [t for t in table_names if self._loaded.get(t) != versions[t]]
+        if not stale:
+            return
+        with self._load_lock:
+            con = self._con.cursor()
+            for table in stale:
+                if self._loaded.get(table) == versions[table]:
+                    continue
+                # Build the new copy under a loading name, then swap it in with one transaction,
+                # so queries running meanwhile see either the old table or the complete new one.
+                loading = table + _LOADING_SUFFIX
+                if self.source == "files":
+                    self._load_from_file(con, table, loading)
+                else:
+                    self._load_from_database(con, table, loading)
+                con.execute("BEGIN TRANSACTION")
+                try:
+                    con.execute(f'DROP TABLE IF EXISTS "{table}"')
+                    con.execute(f'ALTER TABLE "{loading}" RENAME TO "{table}"')
+                    con.execute("COMMIT")
+                except Exception:
+                    con.execute("ROLLBACK")
+                    raise
+                self._loaded[table] = versions[table]
+                print(f"🦆 Loaded '{table}' into the columnar engine (version {versions[table]}, from {self.source}).")
+            con.close()
+
+    def execute(self, query: str, timeout_ms: int = None, limits=None):
+        """
+        Runs `query` and returns its rows as a DataFrame; TimeoutError past `timeout_ms`.
+        With `limits` (db_connector._Limits) rows are fetched in chunks through
+        limits.take() and fetching stops once a limit is reached.
+        """
+        self.ensure_loaded(sorted(referenced_tables(query)))
+        con = self._con.cursor()
+        timer = None
+        if timeout_ms:
+            timer = threading.Timer(timeout_ms / 1000, con.interrupt)
+            timer.start()
+        try:
+            result = con.execute(query)
+            if limits is None:
+                return result.df()
+            batches = []
+            while True:
+                chunk = result.fetch_df_chunk(1)
+                if chunk.empty:
+                    if not batches:
+                        batches.append(chunk)
+                    break
+                batches.append(limits.take(chunk))
+                if limits.reached:
+                    break
+            return pd.concat(batches, ignore_index=True) if len(batches) > 1 else batches[0]
+        except _require_duckdb().InterruptException as e:
+            raise TimeoutError(f"Query exceeded {timeout_ms} ms on the columnar engine.") from e
+        finally:
+            if timer:
+                timer.cancel()
+            con.close()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_columnar_engine() -> ColumnarEngine:
+    """The process-wide columnar engine, created on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = ColumnarEngine()
+    return _engine
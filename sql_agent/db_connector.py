@@ -1,60 +1,238 @@
-# shared/db_connector.py
-from sqlalchemy import create_engine, text, inspect
-from dotenv import load_dotenv
+# sql_agent/db_connector.py
 import os
+import sys
+import asyncio
+from contextlib import contextmanager, nullcontext
+from typing import Iterator
+import pandas as pd
+from sqlalchemy import text
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.db_connector import get_engine as _get_shared_engine, get_async_engine, statement_timeout, interrupt_after, \
+    read_only as _read_only
+from sql_agent.result_transport import frame_from_rows
+from sql_agent.schema_catalog import schema_catalog
 
 load_dotenv()
+# "database" runs agent queries on DB_URI; "duckdb" on the embedded columnar engine (sql_agent/columnar_engine.py).
+QUERY_ENGINE = os.getenv("SQL_AGENT_ENGINE", "database")
+# Rows fetched from the server-side cursor per batch.
+STREAM_BATCH_ROWS = int(os.getenv("SQL_STREAM_BATCH_ROWS", "1000"))
+# Limits on what one query may load into the process; 0 disables a limit.
+MAX_ROWS = int(os.getenv("SQL_MAX_ROWS", "100000"))
+MAX_BYTES = int(os.getenv("SQL_MAX_BYTES", str(256 * 1024 * 1024)))
 DB_URI = os.getenv("DB_URI")
 if not DB_URI:
     raise ValueError("DB_URI not found in environment variables. Please check your .env file.")
-    
-# Add pool_recycle to prevent connections from timing out
-engine = create_engine(DB_URI, pool_recycle=3600)
+
 
 def get_engine():
-    """Returns the SQLAlchemy engine instance."""
-    return engine
+    """Returns the shared reader engine the agent queries through."""
+    return _get_shared_engine("reader")
 
-def execute_sql(query: str):
+def execute_sql(query: str, timeout_ms: int = None, max_rows: int = None, max_bytes: int = None,
+                read_only: bool = False):
     """
-    Executes a SQL query and returns the result as a list of dictionaries.
+    Executes a SQL query and returns its rows as a pandas DataFrame.
     This version ensures all results are fetched to prevent 'Commands out of sync' errors.
+    `timeout_ms` overrides the reader engine's statement timeout for this query.
+    Rows are read in batches from a server-side cursor and reading stops at
+    `max_rows` rows or `max_bytes` bytes (SQL_MAX_ROWS / SQL_MAX_BYTES by
+    default); a cut-short frame has frame.attrs["truncated"] set.
+    Safe to call from several threads at once; each call checks out its own pooled connection.
+    With SQL_AGENT_ENGINE=duckdb the query runs on the embedded columnar engine,
+    falling back to the database if the engine cannot answer it.
+    `read_only` runs the query in a read-only transaction (see shared.db_connector.read_only),
+    for SQL the agent did not write itself; such queries always go to the database,
+    since the columnar engine cannot enforce it.
     """
+    if QUERY_ENGINE == "duckdb" and not read_only:
+        result = _execute_columnar(query, timeout_ms, max_rows, max_bytes)
+        if result is not None:
+            return result
+
     try:
-        with engine.connect() as conn:
-            # Use a transaction block for safety
-            with conn.begin():
-                result_proxy = conn.execute(text(query))
-                
-                # Check if the query is expected to return rows
-                if result_proxy.returns_rows:
-                    # EAGERLY FETCH ALL RESULTS into a list of dictionaries.
-                    # This is the key fix: it consumes the full result set.
-                    results = [dict(row._mapping) for row in result_proxy.fetchall()]
-                    return results
-                else:
-                    # For non-row-returning statements (INSERT, UPDATE)
-                    return {"status": "success", "rows_affected": result_proxy.rowcount}
+        with get_engine().connect() as conn:
+            return _execute_on(conn, query, timeout_ms, max_rows, max_bytes, read_only)
+    except Exception as e:
+        return _sql_error(query, e)
 
+
+async def execute_sql_async(query: str, timeout_ms: int = None, max_rows: int = None, max_bytes: int = None,
+                            read_only: bool = False):
+    """
+    execute_sql() for async callers, with the same arguments and results. The
+    query runs on the async reader engine (asyncpg / aiomysql / aiosqlite), so
+    no thread waits on the database. Without an installed async driver, or with
+    SQL_AGENT_ENGINE=duckdb, execute_sql() runs in a worker thread instead.
+    """
+    engine = _async_engine()
+    if engine is None or QUERY_ENGINE == "duckdb":
+        return await asyncio.to_thread(execute_sql, query, timeout_ms, max_rows, max_bytes, read_only)
+    try:
+        async with engine.connect() as conn:
+            async with interrupt_after(conn, timeout_ms):
+                return await conn.run_sync(_execute_on, query, timeout_ms, max_rows, max_bytes, read_only)
     except Exception as e:
-        # The error message from the traceback indicates this happens during connection reset,
-        # which means the primary operation might have appeared to succeed.
-        # We log the specific error for debugging.
-        print(f"--- SQL Execution or Connection Reset Error ---")
-        print(f"Query: {query}")
-        print(f"Error: {e}")
-        print(f"-------------------------------------------------")
+        return _sql_error(query, e)
+
+
+def _execute_columnar(query: str, timeout_ms: int = None, max_rows: int = None, max_bytes: int = None):
+    """The query's result on the columnar engine, or None to run it on the database instead."""
+    try:
+        from sql_agent.columnar_engine import get_columnar_engine
+        limits = _Limits(max_rows, max_bytes)
+        frame = get_columnar_engine().execute(query, timeout_ms, limits)
+        if limits.reached:
+            frame.attrs["truncated"] = True
+            print(f"⚠️ Result cut at {limits.rows} rows / {limits.bytes} bytes (SQL_MAX_ROWS / SQL_MAX_BYTES).")
+        return frame
+    except TimeoutError as e:
+        # Already over budget: re-running on the database would only double the wait.
+        print(f"⚠️ {e}")
         return {"error": str(e), "query": query}
+    except Exception as e:
+        print(f"⚠️ Columnar engine failed ({e}); running the query on the database instead.")
+        return None
+
+
+def _execute_on(conn, query: str, timeout_ms: int = None, max_rows: int = None, max_bytes: int = None,
+                read_only: bool = False):
+    """execute_sql() on an open connection; execute_sql_async() runs it through AsyncConnection.run_sync."""
+    with _read_only(conn) if read_only else nullcontext(), _streaming(conn, timeout_ms):
+        result_proxy = conn.execute(text(query))
+
+        # Check if the query is expected to return rows
+        if not result_proxy.returns_rows:
+            # For non-row-returning statements (INSERT, UPDATE)
+            conn.commit()
+            return {"status": "success", "rows_affected": result_proxy.rowcount}
+
+        # Collect the batches; only the rows kept are ever materialized.
+        limits = _Limits(max_rows, max_bytes)
+        batches = list(_read_batches(conn, result_proxy, STREAM_BATCH_ROWS, limits))
+        frame = pd.concat(batches, ignore_index=True) if len(batches) > 1 else batches[0]
+        if limits.reached:
+            frame.attrs["truncated"] = True
+            print(f"⚠️ Result cut at {limits.rows} rows / {limits.bytes} bytes (SQL_MAX_ROWS / SQL_MAX_BYTES).")
+        return frame
+
+
+def _sql_error(query: str, e: Exception) -> dict:
+    # The error message from the traceback indicates this happens during connection reset,
+    # which means the primary operation might have appeared to succeed.
+    # We log the specific error for debugging.
+    print(f"--- SQL Execution or Connection Reset Error ---")
+    print(f"Query: {query}")
+    print(f"Error: {e}")
+    print(f"-------------------------------------------------")
+    return {"error": str(e), "query": query}
+
+
+_async_unavailable = False
+
+
+def _async_engine():
+    """The async reader engine, or None when it cannot be built (reported once)."""
+    global _async_unavailable
+    if _async_unavailable:
+        return None
+    try:
+        return get_async_engine("reader")
+    except (ImportError, ValueError) as e:
+        _async_unavailable = True
+        print(f"ℹ️ {e} Async queries will run execute_sql() in worker threads.")
+        return None
+
+
+def stream_sql(query: str, timeout_ms: int = None, batch_rows: int = None, max_rows: int = None,
+               max_bytes: int = None) -> Iterator[pd.DataFrame]:
+    """
+    Runs a row-returning query on a server-side cursor and yields its rows as
+    DataFrames of up to `batch_rows` rows, stopping at `max_rows` rows or
+    `max_bytes` bytes (SQL_MAX_ROWS / SQL_MAX_BYTES by default; 0 means no
+    limit). Stopping early, by breaking out of the loop or closing the
+    generator, abandons the rest of the result without reading it and
+    returns the connection. Errors are raised, not returned.
+    """
+    batch_rows = batch_rows or STREAM_BATCH_ROWS
+    with get_engine().connect() as conn, _streaming(conn, timeout_ms, batch_rows):
+        result_proxy = conn.execute(text(query))
+        if not result_proxy.returns_rows:
+            raise ValueError("stream_sql() needs a query that returns rows; use execute_sql() for statements.")
+        yield from _read_batches(conn, result_proxy, batch_rows, _Limits(max_rows, max_bytes))
+
+
+@contextmanager
+def _streaming(conn, timeout_ms: int = None, batch_rows: int = None):
+    # Server-side cursor on Postgres and MySQL; SQLite always steps through rows lazily.
+    conn.execution_options(stream_results=True, max_row_buffer=batch_rows or STREAM_BATCH_ROWS)
+    if timeout_ms:
+        with statement_timeout(conn, timeout_ms):
+            yield conn
+    else:
+        yield conn
+
+
+class _Limits:
+    """Row and byte budget of one query's result, and how much of it was used."""
+
+    def __init__(self, max_rows: int = None, max_bytes: int = None):
+        self.max_rows = MAX_ROWS if max_rows is None else max_rows
+        self.max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+        self.rows = self.bytes = 0
+        self.reached = False
+
+    def take(self, batch: pd.DataFrame) -> pd.DataFrame:
+        """The part of `batch` within budget. `reached` is set only once rows beyond a cap arrive."""
+        if self.max_bytes and self.bytes > self.max_bytes:
+            # The previous batch crossed the byte cap; this one shows the result really goes on.
+            self.reached = True
+            return batch.iloc[:0]
+        if self.max_rows and self.rows + len(batch) > self.max_rows:
+            batch = batch.iloc[:self.max_rows - self.rows]
+            self.reached = True
+        self.rows += len(batch)
+        self.bytes += int(batch.memory_usage(deep=True).sum())
+        return batch
+
+
+def _read_batches(conn, result_proxy, batch_rows: int, limits: _Limits) -> Iterator[pd.DataFrame]:
+    """Batches of `result_proxy` within `limits`; always yields at least one (possibly empty) frame."""
+    columns = list(result_proxy.keys())
+    exhausted = False
+    try:
+        yielded = False
+        for rows in result_proxy.partitions(batch_rows):
+            batch = limits.take(frame_from_rows(rows, columns))
+            yielded = True
+            yield batch
+            if limits.reached:
+                break
+        else:
+            exhausted = True
+            if not yielded:
+                yield frame_from_rows([], columns)
+    finally:
+        if not exhausted:
+            _abandon(conn, result_proxy)
+
+
+def _abandon(conn, result_proxy):
+    """Stops reading a partly consumed streamed result."""
+    if conn.dialect.name in ("mysql", "mariadb"):
+        # Closing an unbuffered MySQL cursor would read every remaining row; dropping the connection doesn't.
+        conn.invalidate()
+    else:
+        result_proxy.close()
 
 
 def get_db_schema():
-    """Inspects the database and returns a string representation of the schema."""
-    inspector = inspect(engine)
-    schema_info = ""
-    for table_name in inspector.get_table_names():
-        schema_info += f"Table '{table_name}':\n"
-        columns = inspector.get_columns(table_name)
-        for column in columns:
-            schema_info += f"  - {column['name']} ({column['type']})\n"
-        schema_info += "\n"
-    return schema_info
\ No newline at end of file
+    """Returns a string representation of the schema, from the lazily refreshed schema catalog."""
+    return schema_catalog.schema_text()
+
+
+def get_db_schema_info():
+    """The schema as structured data: {table name: TableInfo with its columns}."""
+    return schema_catalog.tables()
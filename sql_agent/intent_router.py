@@ -0,0 +1,144 @@
+# sql_agent/intent_router.py
+"""
+Routes a natural-language data request to the SQLAgent templates it asks for.
+
+Every template has weighted keywords. All of them are compiled into one
+Aho-Corasick automaton, so a request is scored against every template in a
+single pass over its text, whatever the number of keywords. Matches must
+start and end on word boundaries, overlapping matches resolve to the
+leftmost-longest one ("product category" wins over "product"), and each
+keyword counts once per request. A request routes to the top-scoring
+template plus any other within ROUTE_MIN_SHARE of it, up to MAX_TEMPLATES;
+a request that matches nothing routes nowhere.
+"""
+import os
+from collections import deque
+from typing import Dict, Iterator, List, Tuple
+
+# Templates one request may route to.
+MAX_TEMPLATES = int(os.getenv("SQL_AGENT_MAX_TEMPLATES", "2"))
+# A secondary template needs at least this share of the top template's score.
+ROUTE_MIN_SHARE = float(os.getenv("SQL_AGENT_ROUTE_MIN_SHARE", "0.5"))
+
+# template -> {keyword: weight}. Specific terms weigh more than terms several templates share.
+TEMPLATE_KEYWORDS: Dict[str, Dict[str, float]] = {
+    "sales_performance": {
+        "sales": 3, "sale": 2, "commercial": 3, "growth": 1.5, "growth rate": 2, "quarterly": 1.5, "quarter": 1.5,
+        "top-selling": 2, "best-selling": 2, "selling": 1, "region": 1, "regions": 1, "product category": 2.5,
+        "product categories": 2.5, "category": 1, "revenue": 1,
+    },
+    "marketing_efficiency": {
+        "marketing": 3, "roi": 3, "return on ad spend": 3, "roas": 3, "ad spend": 2.5, "spend": 2, "budget": 1.5,
+        "conversion": 2, "conversions": 2, "conversion rate": 2.5, "leads": 2.5, "lead": 2, "cost per lead": 3,
+        "channel": 1.5, "channels": 1.5, "campaign": 2, "campaigns": 2, "social media": 2, "engagement": 1.5,
+        "followers": 1.5, "platform": 1, "acquisition cost": 2, "customer acquisition cost": 3,
+    },
+    "customer_insights": {
+        "customer": 2, "customers": 2, "satisfaction": 3, "churn": 3, "retention": 3, "segment": 2.5,
+        "segments": 2.5, "lifetime value": 3, "ltv": 3, "support tickets": 2, "tickets": 1.5, "nps": 2,
+        "loyalty": 2,
+    },
+    "product_performance": {
+        "product": 2, "products": 2, "product line": 3, "product lines": 3, "rating": 2.5, "ratings": 2.5,
+        "margin": 2.5, "margins": 2.5, "profit margin": 3, "performance": 0.5,
+    },
+    "financial_overview": {
+        "financial": 3, "finance": 2, "finances": 2, "kpi": 2.5, "kpis": 2.5, "overview": 2, "total": 0.5,
+        "total revenue": 2.5, "profit": 1.5, "ebitda": 3, "performance rating": 3, "variance": 1.5,
+    },
+}
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over lower-case keywords."""
+
+    def __init__(self, keywords):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+        for keyword in keywords:
+            state = 0
+            for ch in keyword:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(keyword)
+
+        # Breadth-first failure links; each state also reports its failure state's keywords.
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> Iterator[Tuple[int, str]]:
+        """(start index, keyword) for every occurrence of every keyword in `text`."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for keyword in out[state]:
+                yield i - len(keyword) + 1, keyword
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class IntentRouter:
+    def __init__(self, template_keywords: Dict[str, Dict[str, float]] = TEMPLATE_KEYWORDS):
+        self._order = list(template_keywords)
+        self._weights: Dict[str, List[Tuple[str, float]]] = {}
+        for template, keywords in template_keywords.items():
+            for keyword, weight in keywords.items():
+                self._weights.setdefault(keyword.lower(), []).append((template, weight))
+        self._automaton = KeywordAutomaton(self._weights)
+
+    def matches(self, text: str) -> List[str]:
+        """Keywords found in `text`: whole words only, leftmost-longest where matches overlap."""
+        text = text.lower()
+        found = []
+        for start, keyword in self._automaton.find(text):
+            end = start + len(keyword)
+            if (start == 0 or not _is_word_char(text[start - 1])) and (end == len(text) or not _is_word_char(text[end])):
+                found.append((start, end, keyword))
+        found.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        chosen, covered_to = [], 0
+        for start, end, keyword in found:
+            if start >= covered_to:
+                chosen.append(keyword)
+                covered_to = end
+        return chosen
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Score of every template with at least one keyword in `text`."""
+        scores: Dict[str, float] = {}
+        for keyword in set(self.matches(text)):
+            for template, weight in self._weights[keyword]:
+                scores[template] = scores.get(template, 0.0) + weight
+        return scores
+
+    def route(self, text: str, max_templates: int = MAX_TEMPLATES, min_share: float = ROUTE_MIN_SHARE) -> List[str]:
+        """Templates for `text`, best first; empty when no keyword matches."""
+        scores = self.scores(text)
+        if not scores:
+            return []
+        ranked = sorted(scores, key=lambda t: (-scores[t], self._order.index(t)))
+        top = scores[ranked[0]]
+        return [t for t in ranked if scores[t] >= top * min_share][:max(1, max_templates)]
+
+
+# Shared by every SQLAgent in the process.
+intent_router = IntentRouter()
@@ -0,0 +1,192 @@
+# sql_agent/plan_analyzer.py
+"""
+EXPLAINs every SQLAgent query template on the configured backend and flags
+full table scans and sorts, compares each template with its single-scan
+rewrites (sql_agent/query_templates.SINGLE_SCAN_TEMPLATES) by plan and by
+timing, and lists ranking columns that lack the index turning an
+ORDER BY ... LIMIT 1 subquery into an index probe.
+
+    python -m sql_agent.plan_analyzer --repeat 5
+    python -m sql_agent.plan_analyzer --create-indexes
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+from typing import Dict, List
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import inspect
+from sql_agent.query_templates import template_variants
+
+_RANKING = re.compile(r"FROM\s+(\w+)\s+ORDER\s+BY\s+(\w+)\s+DESC\s+LIMIT\s+1", re.IGNORECASE)
+
+
+def explain(conn, sql_query: str) -> List[str]:
+    """The backend's plan for `sql_query`, one readable line per plan step."""
+    sql_query = sql_query.strip().rstrip(";")
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        return [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql_query}")]
+    if dialect == "postgresql":
+        return [row[0] for row in conn.exec_driver_sql(f"EXPLAIN {sql_query}")]
+    if dialect in ("mysql", "mariadb"):
+        rows = conn.exec_driver_sql(f"EXPLAIN {sql_query}").mappings().all()
+        return [f"table={r.get('table')} type={r.get('type')} key={r.get('key')} extra={r.get('Extra')}" for r in rows]
+    raise ValueError(f"No EXPLAIN support for dialect '{dialect}'.")
+
+
+def plan_findings(plan: List[str], dialect: str) -> Dict[str, list]:
+    """Full table scans and sort steps found in a plan from explain()."""
+    scans, sorts = [], []
+    # Subqueries SQLite runs as co-routines are scanned in memory, not read from a table.
+    coroutines = {line.split(" ", 1)[1] for line in plan if dialect == "sqlite" and line.startswith("CO-ROUTINE ")}
+    for line in plan:
+        if dialect == "sqlite":
+            m = re.match(r"SCAN (\S+)(.*)", line)
+            if m and "INDEX" not in m.group(2) and m.group(1) not in coroutines:
+                scans.append(m.group(1))
+            if "TEMP B-TREE" in line:
+                sorts.append(line)
+        elif dialect == "postgresql":
+            m = re.search(r"Seq Scan on (\w+)", line)
+            if m:
+                scans.append(m.group(1))
+            if re.search(r"(^|->\s*)(Incremental )?Sort\b", line.strip()):
+                sorts.append(line.strip())
+        else:
+            m = re.search(r"table=(\S+) type=ALL", line)
+            if m:
+                scans.append(m.group(1))
+            if "filesort" in line:
+                sorts.append(line)
+    return {"scans": scans, "sorts": sorts}
+
+
+def time_query(engine, sql_query: str, repeat: int = 5):
+    """Median wall time in ms over `repeat` runs after one warm-up run, and the rows of the last run."""
+    timings, rows = [], None
+    with engine.connect() as conn:
+        conn.exec_driver_sql(sql_query.strip().rstrip(";")).fetchall()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with engine.connect() as conn:
+            rows = conn.exec_driver_sql(sql_query.strip().rstrip(";")).fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, rows
+
+
+def missing_ranking_indexes(engine, templates: Dict[str, str]) -> List[tuple]:
+    """(table, column) pairs templates rank by with ORDER BY ... DESC LIMIT 1 that no index leads with."""
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    missing = set()
+    for sql_query in templates.values():
+        for table, column in _RANKING.findall(sql_query):
+            if table not in existing:
+                continue
+            leading = {ix["column_names"][0] for ix in inspector.get_indexes(table) if ix["column_names"]}
+            if column not in leading:
+                missing.add((table, column))
+    return sorted(missing)
+
+
+def create_ranking_indexes(engine, pairs) -> List[str]:
+    """Creates an index for each (table, column); ingestion builds the same ones from the schema registry."""
+    q = engine.dialect.identifier_preparer.quote
+    created = []
+    for table, column in pairs:
+        name = f"ix_{table}_{column}"[:63]
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"CREATE INDEX {q(name)} ON {q(table)} ({q(column)})")
+        created.append(name)
+    return created
+
+
+def _comparable(rows):
+    return [tuple(round(v, 6) if isinstance(v, float) else v for v in row) for row in rows or []]
+
+
+def analyze_templates(engine, repeat: int = 5) -> List[dict]:
+    """
+    One entry per (template, variant) runnable on the engine's backend:
+    plan findings, median time, and whether the result matches the original.
+    """
+    report = []
+    variants = template_variants(engine.dialect.name)
+    originals = {}
+    for variant, templates in variants.items():
+        for name, sql_query in templates.items():
+            entry = {"template": name, "variant": variant}
+            try:
+                with engine.connect() as conn:
+                    plan = explain(conn, sql_query)
+                entry.update(plan=plan, **plan_findings(plan, engine.dialect.name))
+                entry["median_ms"], rows = time_query(engine, sql_query, repeat)
+                if variant == "original":
+                    originals[name] = _comparable(rows)
+                entry["matches_original"] = _comparable(rows) == originals.get(name)
+            except Exception as e:
+                entry["error"] = str(e).splitlines()[0]
+            report.append(entry)
+    return report
+
+
+def print_report(report: List[dict]):
+    print(f"{'template':<22} {'variant':<9} {'scans':>5} {'sorts':>5} {'median ms':>10}  notes")
+    best = {}
+    for entry in report:
+        if "error" not in entry and entry["matches_original"]:
+            current = best.get(entry["template"])
+            if current is None or entry["median_ms"] < current["median_ms"]:
+                best[entry["template"]] = entry
+
+    for entry in report:
+        if "error" in entry:
+            print(f"{entry['template']:<22} {entry['variant']:<9} ❌ {entry['error']}")
+            continue
+        notes = []
+        if len(entry["scans"]) > 1:
+            notes.append(f"⚠️ {len(entry['scans'])} full scans ({', '.join(entry['scans'])})")
+        if entry["sorts"]:
+            notes.append(f"⚠️ {len(entry['sorts'])} sort(s)")
+        if not entry["matches_original"]:
+            notes.append("⚠️ result differs from original (ties in the ranking column make the argmax ambiguous)")
+        if best.get(entry["template"]) is entry:
+            notes.append("✅ fastest")
+        print(f"{entry['template']:<22} {entry['variant']:<9} {len(entry['scans']):>5} {len(entry['sorts']):>5} "
+              f"{entry['median_ms']:>10.2f}  {'; '.join(notes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per query")
+    parser.add_argument("--create-indexes", action="store_true", help="create the missing ranking-column indexes")
+    parser.add_argument("--plans", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    from shared.db_connector import get_engine
+    engine = get_engine("reader")
+
+    report = analyze_templates(engine, args.repeat)
+    print_report(report)
+    if args.plans:
+        for entry in report:
+            print(f"\n-- {entry['template']} ({entry['variant']})")
+            print("\n".join(entry.get("plan", [])))
+
+    missing = missing_ranking_indexes(engine, template_variants(engine.dialect.name)["original"])
+    if missing:
+        print("\nRanking columns without an index: " + ", ".join(f"{t}.{c}" for t, c in missing))
+        if args.create_indexes:
+            created = create_ranking_indexes(get_engine("writer"), missing)
+            print(f"✅ Created {', '.join(created)}")
+    else:
+        print("\n✅ Every ranking column is indexed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# sql_agent/query_templates.py
+"""
+SQL templates the SQLAgent runs for each request type, keyed by the names
+_identify_query_type returns. Kept free of the LLM and DB imports so
+benchmarks and tooling can load them without credentials.
+"""
+
+QUERY_TEMPLATES = {
+    "sales_performance": """
+    SELECT 
+        SUM(revenue_current_quarter) as total_sales,
+        ROUND(AVG((revenue_current_quarter - revenue_previous_quarter) / revenue_previous_quarter * 100), 2) as avg_growth_rate,
+        (SELECT product_category FROM commercial_performance ORDER BY revenue_current_quarter DESC LIMIT 1) as top_category
+    FROM commercial_performance;
+    """,
+    
+    "marketing_efficiency": """
+    SELECT 
+        AVG(return_on_ad_spend) as avg_roi,
+        SUM(monthly_budget) as total_spend,
+        AVG(conversion_to_customer_percent) as avg_conversion,
+        SUM(leads_generated) as total_leads,
+        (SELECT channel FROM marketing_spend_performance ORDER BY return_on_ad_spend DESC LIMIT 1) as best_channel
+    FROM marketing_spend_performance;
+    """,
+    
+    "customer_insights": """
+    SELECT 
+        AVG(satisfaction_score) as avg_satisfaction,
+        AVG(churn_rate_percent) as avg_churn,
+        AVG(lifetime_value) as avg_ltv,
+        (SELECT segment FROM customer_segments ORDER BY revenue_contribution_percent DESC LIMIT 1) as top_segment
+    FROM customer_segments;
+    """,
+    
+    "product_performance": """
+    SELECT 
+        (SELECT product_line FROM product_performance ORDER BY revenue DESC LIMIT 1) as top_product,
+        SUM(revenue) as total_revenue,
+        AVG(customer_rating) as avg_rating,
+        AVG(profit_margin_percent) as avg_margin
+    FROM product_performance;
+    """,
+    
+    "financial_overview": """
+    SELECT 
+        current_value as total_revenue,
+        variance_percent as growth_rate,
+        performance_rating as rating
+    FROM financial_kpis 
+    WHERE metric = 'Total Revenue';
+    """
+}
+
+# Rewrites that compute each template in a single pass over its table, keyed by
+# variant. They are proposals for sql_agent.plan_analyzer to compare against the
+# originals; the agent itself always runs the originals. "sqlite" relies on
+# SQLite's documented bare-column behaviour: with a single MAX() aggregate,
+# product_category etc. come from the row holding the maximum. "window" is the
+# portable form (SQLite 3.25+, Postgres, MySQL 8) but sorts the whole table.
+# Neither breaks ties in the ranking column the way the originals do, and with
+# the ranking-column indexes created at ingestion the originals are index
+# probes that win by a wide margin.
+SINGLE_SCAN_TEMPLATES = {
+    "sqlite": {
+        "sales_performance": """
+        SELECT total_sales, avg_growth_rate, top_category FROM (
+            SELECT
+                SUM(revenue_current_quarter) as total_sales,
+                ROUND(AVG((revenue_current_quarter - revenue_previous_quarter) / revenue_previous_quarter * 100), 2) as avg_growth_rate,
+                product_category as top_category,
+                MAX(revenue_current_quarter) as _rank
+            FROM commercial_performance
+        );
+        """,
+
+        "marketing_efficiency": """
+        SELECT avg_roi, total_spend, avg_conversion, total_leads, best_channel FROM (
+            SELECT
+                AVG(return_on_ad_spend) as avg_roi,
+                SUM(monthly_budget) as total_spend,
+                AVG(conversion_to_customer_percent) as avg_conversion,
+                SUM(leads_generated) as total_leads,
+                channel as best_channel,
+                MAX(return_on_ad_spend) as _rank
+            FROM marketing_spend_performance
+        );
+        """,
+
+        "customer_insights": """
+        SELECT avg_satisfaction, avg_churn, avg_ltv, top_segment FROM (
+            SELECT
+                AVG(satisfaction_score) as avg_satisfaction,
+                AVG(churn_rate_percent) as avg_churn,
+                AVG(lifetime_value) as avg_ltv,
+                segment as top_segment,
+                MAX(revenue_contribution_percent) as _rank
+            FROM customer_segments
+        );
+        """,
+
+        "product_performance": """
+        SELECT top_product, total_revenue, avg_rating, avg_margin FROM (
+            SELECT
+                product_line as top_product,
+                SUM(revenue) as total_revenue,
+                AVG(customer_rating) as avg_rating,
+                AVG(profit_margin_percent) as avg_margin,
+                MAX(revenue) as _rank
+            FROM product_performance
+        );
+        """,
+    },
+
+    "window": {
+        "sales_performance": """
+        SELECT
+            SUM(revenue_current_quarter) as total_sales,
+            ROUND(AVG((revenue_current_quarter - revenue_previous_quarter) / revenue_previous_quarter * 100), 2) as avg_growth_rate,
+            MAX(CASE WHEN _rn = 1 THEN product_category END) as top_category
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (ORDER BY revenue_current_quarter DESC) as _rn FROM commercial_performance
+        ) ranked;
+        """,
+
+        "marketing_efficiency": """
+        SELECT
+            AVG(return_on_ad_spend) as avg_roi,
+            SUM(monthly_budget) as total_spend,
+            AVG(conversion_to_customer_percent) as avg_conversion,
+            SUM(leads_generated) as total_leads,
+            MAX(CASE WHEN _rn = 1 THEN channel END) as best_channel
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (ORDER BY return_on_ad_spend DESC) as _rn FROM marketing_spend_performance
+        ) ranked;
+        """,
+
+        "customer_insights": """
+        SELECT
+            AVG(satisfaction_score) as avg_satisfaction,
+            AVG(churn_rate_percent) as avg_churn,
+            AVG(lifetime_value) as avg_ltv,
+            MAX(CASE WHEN _rn = 1 THEN segment END) as top_segment
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (ORDER BY revenue_contribution_percent DESC) as _rn FROM customer_segments
+        ) ranked;
+        """,
+
+        "product_performance": """
+        SELECT
+            MAX(CASE WHEN _rn = 1 THEN product_line END) as top_product,
+            SUM(revenue) as total_revenue,
+            AVG(customer_rating) as avg_rating,
+            AVG(profit_margin_percent) as avg_margin
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (ORDER BY revenue DESC) as _rn FROM product_performance
+        ) ranked;
+        """,
+    },
+}
+
+
+def template_variants(dialect: str) -> dict:
+    """{variant name: templates} runnable on `dialect`, starting with the originals."""
+    variants = {"original": QUERY_TEMPLATES}
+    if dialect in SINGLE_SCAN_TEMPLATES:
+        variants[dialect] = SINGLE_SCAN_TEMPLATES[dialect]
+    variants["window"] = SINGLE_SCAN_TEMPLATES["window"]
+    return variants
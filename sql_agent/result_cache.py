@@ -0,0 +1,157 @@
+# sql_agent/result_cache.py
+"""
+Query-result cache for the SQL agent. Keys combine the normalized SQL with the
+data versions of every table it reads (see shared/table_versions.py), so a
+cached result is reused until one of those tables is re-ingested.
+
+Two tiers: an in-process LRU, and an optional on-disk tier (SQL_CACHE_DIR)
+that several workers or restarts can share. Entries for superseded table
+versions are never read again, so the disk tier is pruned least recently used
+first once it outgrows SQL_CACHE_DISK_MAX_BYTES.
+"""
+import os
+import re
+import pickle
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Entries kept in memory; 0 disables the cache.
+CACHE_SIZE = int(os.getenv("SQL_CACHE_SIZE", "256"))
+# Directory of the shared on-disk tier; empty keeps the cache in memory only.
+CACHE_DIR = os.getenv("SQL_CACHE_DIR", "")
+# Size cap of the on-disk tier; the least recently used entries are pruned past it. 0 disables the cap.
+CACHE_DISK_MAX_BYTES = int(os.getenv("SQL_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+
+_IDENT = r"(?:`[^`]+`|\"[^\"]+\"|\[[^\]]+\]|[A-Za-z_][\w$]*)"
+# A table name, optionally schema-qualified (public.sales, "db"."main"."sales").
+_QUALIFIED = rf"{_IDENT}(?:\s*\.\s*{_IDENT})*"
+_TABLE_REF = re.compile(rf"\b(?:FROM|JOIN)\s+({_QUALIFIED})", re.IGNORECASE)
+# The next table of a comma-separated FROM list, after the previous one's optional alias.
+_NEXT_REF = re.compile(rf"(?:\s+(?:AS\s+)?{_IDENT})?\s*,\s*({_QUALIFIED})", re.IGNORECASE)
+_CTE_NAME = re.compile(rf"(?:\bWITH(?:\s+RECURSIVE)?|,)\s*({_IDENT})\s*(?:\([^)]*\)\s*)?AS\s*\(", re.IGNORECASE)
+
+
+def _unquote(identifier: str) -> str:
+    return identifier.strip('`"[]').lower()
+
+
+def referenced_tables(sql_query: str) -> set:
+    """
+    Table names a query reads, taken from its FROM and JOIN clauses: the last
+    part of a qualified name, and no CTE names.
+    """
+    ctes = {_unquote(name) for name in _CTE_NAME.findall(sql_query)}
+    tables = set()
+    for match in _TABLE_REF.finditer(sql_query):
+        while match:
+            tables.add(_unquote(re.findall(_IDENT, match.group(1))[-1]))
+            match = _NEXT_REF.match(sql_query, match.end())
+    return tables - ctes
+
+
+def cache_key(normalized_sql: str, versions: dict) -> tuple:
+    return normalized_sql, tuple(sorted(versions.items()))
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = CACHE_SIZE, disk_dir: str = CACHE_DIR,
+                 disk_max_bytes: int = CACHE_DISK_MAX_BYTES):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir or None
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _disk_path(self, key) -> str:
+        return os.path.join(self.disk_dir, hashlib.sha256(repr(key).encode()).hexdigest() + ".pkl")
+
+    def get(self, key):
+        """Returns (True, result) on a hit and (False, None) on a miss."""
+        if not self.enabled:
+            return False, None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+
+        if self.disk_dir:
+            try:
+                path = self._disk_path(key)
+                with open(path, "rb") as f:
+                    stored_key, value = pickle.load(f)
+                if stored_key == key:
+                    os.utime(path)  # recency for pruning
+                    self._remember(key, value)
+                    with self._lock:
+                        self.hits += 1
+                    return True, value
+            except (OSError, EOFError, pickle.UnpicklingError):
+                pass
+
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        self._remember(key, value)
+        if self.disk_dir:
+            # Write then rename, so readers in other processes never see a partial entry.
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self._disk_path(key))
+            except OSError as e:
+                print(f"⚠️ Could not write result cache entry: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """Deletes the least recently used disk entries until the tier fits in disk_max_bytes."""
+        if not self.disk_max_bytes:
+            return
+        entries, total = [], 0
+        with os.scandir(self.disk_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".pkl"):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue  # pruned by another worker
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        if total <= self.disk_max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+            if total <= self.disk_max_bytes:
+                break
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# Shared by every SQLAgent in the process.
+result_cache = ResultCache()
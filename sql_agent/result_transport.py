@@ -0,0 +1,62 @@
+# sql_agent/result_transport.py
+"""
+How query results travel from the SQL agent to the recommendation agent.
+
+Queries return pandas DataFrames built straight from the cursor's row tuples,
+and the agent's response travels through graph state as a StructuredResponse,
+a plain dict that keeps those frames as they are. Nothing is turned into JSON
+until someone asks for text: str() renders the response (with a preview of
+each frame) for LLM prompts and logs, and is computed at most once.
+"""
+import os
+import json
+from typing import Any, Dict, List, Optional
+import pandas as pd
+
+# Rows of each result frame shown when a response is rendered as JSON.
+PREVIEW_ROWS = int(os.getenv("SQL_RESULT_PREVIEW_ROWS", "20"))
+
+
+def frame_from_rows(rows, columns) -> pd.DataFrame:
+    """A DataFrame of SQLAlchemy row tuples, without building a dict per row."""
+    return pd.DataFrame.from_records(rows, columns=list(columns), coerce_float=False)
+
+
+def frame_from_result(result_proxy) -> pd.DataFrame:
+    """A DataFrame of every row of a SQLAlchemy result."""
+    return frame_from_rows(result_proxy.fetchall(), result_proxy.keys())
+
+
+def frame_records(frame: pd.DataFrame, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Rows of `frame` as dictionaries of plain Python values (missing values as None)."""
+    rows = frame if limit is None else frame.iloc[:limit]
+    return rows.astype(object).where(rows.notna(), None).to_dict("records")
+
+
+def first_record(frame: pd.DataFrame) -> Dict[str, Any]:
+    records = frame_records(frame, 1)
+    return records[0] if records else {}
+
+
+def _json_default(value):
+    if isinstance(value, pd.DataFrame):
+        return {
+            "columns": [str(c) for c in value.columns],
+            "num_rows": len(value),
+            "rows": frame_records(value, PREVIEW_ROWS),
+        }
+    return str(value)
+
+
+class StructuredResponse(dict):
+    """The SQL agent's response; stays a dict in graph state and becomes JSON only through str()."""
+
+    _rendered = None
+
+    def __str__(self):
+        if self._rendered is None:
+            self._rendered = json.dumps(self, default=_json_default, indent=2)
+        return self._rendered
+
+    def to_json(self) -> str:
+        return str(self)
@@ -0,0 +1,88 @@
+# sql_agent/schema_catalog.py
+"""
+Lazily built, versioned catalog of the tables the SQL agent can query.
+
+Nothing is introspected until the schema is first asked for. After that each
+lookup costs one table listing plus the memoized table versions, and only
+tables that are new or whose ingestion version moved are reflected again, in
+one batched get_multi_columns() call instead of one inspector round trip per
+table.
+"""
+import threading
+from dataclasses import dataclass
+from typing import Dict, List
+from sqlalchemy import inspect
+from shared.db_connector import get_engine
+from shared.table_versions import VERSIONS_TABLE, get_table_versions
+from shared.kpi_summary import SUMMARY_TABLE
+from data_ingestion.table_swap import STAGING_SUFFIX, RETIRED_SUFFIX
+
+# Bookkeeping tables and in-flight swap tables the agent should never see.
+_HIDDEN_TABLES = {VERSIONS_TABLE, SUMMARY_TABLE}
+_HIDDEN_SUFFIXES = (STAGING_SUFFIX, RETIRED_SUFFIX)
+
+
+@dataclass(frozen=True)
+class ColumnInfo:
+    name: str
+    type: str
+    nullable: bool = True
+
+
+@dataclass(frozen=True)
+class TableInfo:
+    name: str
+    version: int
+    columns: List[ColumnInfo]
+
+
+class SchemaCatalog:
+    def __init__(self, engine=None):
+        self._engine = engine
+        self._tables: Dict[str, TableInfo] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self):
+        return self._engine or get_engine("reader")
+
+    def _table_names(self) -> List[str]:
+        names = inspect(self.engine).get_table_names()
+        return [n for n in names if n not in _HIDDEN_TABLES and not n.endswith(_HIDDEN_SUFFIXES)]
+
+    def tables(self) -> Dict[str, TableInfo]:
+        """{table name: TableInfo}, re-reflecting only tables that are new or were re-ingested."""
+        with self._lock:
+            names = self._table_names()
+            versions = get_table_versions(names)
+            stale = [n for n in names if n not in self._tables or self._tables[n].version != versions[n]]
+            if stale:
+                reflected = inspect(self.engine).get_multi_columns(filter_names=stale)
+                for (_, table_name), columns in reflected.items():
+                    self._tables[table_name] = TableInfo(
+                        table_name,
+                        versions[table_name],
+                        [ColumnInfo(c["name"], str(c["type"]), c.get("nullable", True)) for c in columns],
+                    )
+            for gone in set(self._tables) - set(names):
+                del self._tables[gone]
+            return {n: self._tables[n] for n in names if n in self._tables}
+
+    def schema_text(self) -> str:
+        """The catalog in get_db_schema()'s text format, for prompts."""
+        schema_info = ""
+        for table in self.tables().values():
+            schema_info += f"Table '{table.name}':\n"
+            for column in table.columns:
+                schema_info += f"  - {column.name} ({column.type})\n"
+            schema_info += "\n"
+        return schema_info
+
+    def invalidate(self):
+        """Forgets everything, e.g. after a schema change made outside ingestion."""
+        with self._lock:
+            self._tables.clear()
+
+
+# Shared by every SQLAgent in the process.
+schema_catalog = SchemaCatalog()
@@ -0,0 +1,67 @@
+# sql_agent/sql_generation.py
+"""
+Checks and caching for SQL the agent generates from natural-language requests.
+
+Generated SQL runs only if it is a single read-only SELECT/WITH statement and
+the backend can EXPLAIN it. Accepted SQL is cached under the normalized
+request text plus a hash of the schema it was generated against, so a repeat
+question skips the LLM until the schema changes.
+"""
+import os
+import re
+import hashlib
+from sql_agent.plan_analyzer import explain
+from sql_agent.result_cache import ResultCache, CACHE_DIR
+
+# Generated statements kept in memory; 0 disables the cache.
+NL_SQL_CACHE_SIZE = int(os.getenv("NL_SQL_CACHE_SIZE", "512"))
+# On-disk tier, shared by workers and restarts; defaults to a subdirectory of SQL_CACHE_DIR.
+NL_SQL_CACHE_DIR = os.getenv("NL_SQL_CACHE_DIR", os.path.join(CACHE_DIR, "nl_sql") if CACHE_DIR else "")
+
+_LITERALS_AND_COMMENTS = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|--[^\n]*|/\*.*?\*/", re.DOTALL)
+_WRITES = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|MERGE|UPSERT|DROP|ALTER|CREATE|TRUNCATE|GRANT|REVOKE|ATTACH|DETACH|PRAGMA|VACUUM"
+    r"|REINDEX|COPY|CALL|EXEC|EXECUTE|LOCK|SET|INTO|LOAD)\b",
+    re.IGNORECASE,
+)
+
+
+def normalize_request(request: str) -> str:
+    """Request text as a cache key: lower case, single spaces, no surrounding punctuation."""
+    return re.sub(r"\s+", " ", request.lower()).strip(" \t.?!")
+
+
+def schema_hash(schema_text: str, dialect: str) -> str:
+    return hashlib.sha256(f"{dialect}\n{schema_text}".encode()).hexdigest()[:16]
+
+
+def check_read_only(sql_query: str):
+    """Raises ValueError unless `sql_query` is one SELECT (or WITH ... SELECT) statement that writes nothing."""
+    code = _LITERALS_AND_COMMENTS.sub(" ", sql_query).strip().rstrip(";").strip()
+    if not code:
+        raise ValueError("Generated SQL is empty.")
+    if ";" in code:
+        raise ValueError("Generated SQL contains more than one statement.")
+    first = code.split(None, 1)[0].upper()
+    if first not in ("SELECT", "WITH"):
+        raise ValueError(f"Generated SQL must be a SELECT query, not {first}.")
+    write = _WRITES.search(code)
+    if write:
+        raise ValueError(f"Generated SQL uses {write.group(1).upper()}, which is not allowed in a read-only query.")
+
+
+def validate_sql(engine, sql_query: str):
+    """check_read_only() plus an EXPLAIN dry run, which catches syntax errors and unknown tables or columns."""
+    check_read_only(sql_query)
+    try:
+        with engine.connect() as conn:
+            explain(conn, sql_query)
+    except ValueError:
+        # explain() does not know this dialect; the read-only check is all that runs before execution.
+        return
+    except Exception as e:
+        raise ValueError(f"Generated SQL failed the EXPLAIN dry run: {str(e).splitlines()[0]}") from e
+
+
+# Shared by every SQLAgent in the process; keys are (normalized request, schema hash).
+generated_sql_cache = ResultCache(max_entries=NL_SQL_CACHE_SIZE, disk_dir=NL_SQL_CACHE_DIR)